@@ -0,0 +1,144 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from game_classes import (
+    Game, Enemy, Archer, Giant, compiled_map, grid_data, grid_width, grid_height, paths,
+    path_distances, rules_version, fps,
+)
+
+# Sabit, tekrarlanabilir senaryolar: (ad, tür başına kule sayısı, önceden yerleştirilen düşman sayısı,
+# sadece havan mı). Düşmanlar yola eşit aralıklarla dizilir; 100'ün üstü spawn sınırını aşar.
+scenarios = {
+    "empty": (0, 0, False),
+    "towers-10": (10, 0, False),
+    "towers-50": (50, 0, False),
+    "towers-200": (200, 0, False),
+    "enemies-100": (10, 100, False),
+    "enemies-300": (10, 300, False),
+    "mortar-splash": (60, 200, True),
+}
+engines = ("game", "skip")
+
+
+def tower_cells(count, seed):
+    # Yola en yakın boş hücreler (kuleler gerçekten ateş etsin), aynı uzaklıktakiler karışık sırada
+    rng = random.Random(seed)
+    cells = [(x, y) for x in range(grid_width) for y in range(grid_height) if (x, y) not in grid_data]
+    rng.shuffle(cells)
+    path = set(path_distances)
+    cells.sort(key=lambda cell: min(abs(cell[0] - x) + abs(cell[1] - y) for x, y in path))
+    return cells[:count]
+
+def build_game(name, seed=0):
+    towers_per_type, enemy_count, mortars_only = scenarios[name]
+    game = Game()
+    game.money = 10 ** 9  # Para sınırı senaryoyu değiştirmesin
+    kinds = ["Mortar"] if mortars_only else ["Tower", "Mortar", "CrossbowTower"]
+    cells = tower_cells(towers_per_type * len(kinds), seed)
+    game.apply_placements([(kinds[i % len(kinds)], x, y) for i, (x, y) in enumerate(cells)])
+
+    rng = random.Random(seed)
+    for i in range(enemy_count):
+        path = paths[i % len(paths)]
+        enemy = rng.choice([Enemy, Archer, Giant])(path)
+        # Yolun ilk yarısına dağıt (ana kule hemen yıkılmasın), fazlası üst üste biner
+        enemy.index = (i // len(paths) * 7) % (len(path) // 2)
+        enemy.x, enemy.y = path[enemy.index]
+        enemy.health = enemy.max_health * 5  # Ölçüm süresince hayatta kalsınlar
+        game.add_enemy(enemy)
+    return game
+
+def run(engine, game, ticks):
+    max_ticks = game.ticks + ticks
+    return game.play_game_instance(render=False, skip_ahead=engine == "skip", max_ticks=max_ticks)
+
+def measure(name, engine, ticks, repeat, seed=0):
+    # Süre ölçümü tracemalloc kapalıyken yapılır (en iyi tekrar alınır), bellek ayrı bir turda ölçülür
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run(engine, build_game(name, seed), ticks)
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run(engine, build_game(name, seed), ticks)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = min(latencies)
+    return {
+        "scenario": name,
+        "engine": engine,
+        "ticks": result["ticks"],
+        "ticks_per_sec": result["ticks"] / best,
+        "latency_sec": best,
+        "latency_mean_sec": sum(latencies) / len(latencies),
+        "peak_memory_bytes": peak_memory,
+        "score": result["score"],  # Motorlar aynı sonucu vermeli
+        "main_tower_health": result["main_tower_health"],
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(previous, current):
+    # Aynı (senaryo, motor) çiftleri için tick/sn oranını yazdır
+    before = {(row["scenario"], row["engine"]): row for row in previous["results"]}
+    for row in current["results"]:
+        old = before.get((row["scenario"], row["engine"]))
+        if old is not None:
+            print(f"{row['scenario']:>14} {row['engine']:>6}: {row['ticks_per_sec']:10.0f} ticks/s "
+                  f"({row['ticks_per_sec'] / old['ticks_per_sec']:.2f}x)", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless simülasyon hız ölçümü")
+    parser.add_argument("--scenarios", default=",".join(scenarios))
+    parser.add_argument("--engines", default="game,skip")
+    parser.add_argument("--ticks", type=int, default=2 * 60 * fps)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON sonucun yazılacağı dosya (varsayılan: stdout)")
+    parser.add_argument("--compare", help="Önceki bir çalıştırmanın JSON dosyası")
+    args = parser.parse_args(argv)
+
+    report = {
+        "revision": git_revision(),
+        "map": compiled_map.digest,
+        "rules_version": rules_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ticks": args.ticks,
+        "repeat": args.repeat,
+        "results": [],
+    }
+    for name in args.scenarios.split(","):
+        for engine in args.engines.split(","):
+            row = measure(name, engine, args.ticks, args.repeat)
+            report["results"].append(row)
+            print(f"{name:>14} {engine:>6}: {row['ticks_per_sec']:10.0f} ticks/s, "
+                  f"{row['latency_sec'] * 1000:8.1f} ms, {row['peak_memory_bytes'] / 1024:8.0f} KiB",
+                  file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), report)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
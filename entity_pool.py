@@ -0,0 +1,66 @@
+from itertools import islice
+
+
+class EntityPool:
+    # Sabit kapasiteli, boşluksuz birim deposu. Elemanlar items[0:count] aralığında durur ve her biri
+    # kendi yerini "slot" özelliğinde bilir; silme son elemanı silinenin yerine taşıdığı için O(1)'dir.
+    # Bu yüzden sıra ekleme sırası değildir ama deterministiktir.
+    # recycle=True ise silinen nesneler türlerine göre free listelerde tutulur ve acquire() önce oradan
+    # yeniden kullanır; sadece nesneleri acquire() ile kurulan havuzlar (düşmanlar) için açılmalı.
+    __slots__ = ("items", "count", "free", "recycle")
+
+    def __init__(self, capacity=0, recycle=False):
+        self.items = [None] * capacity  # Kapasite aşılırsa liste büyür
+        self.count = 0
+        self.free = {}  # Tür -> yeniden kullanılabilir nesneler
+        self.recycle = recycle
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return islice(self.items, self.count)
+
+    def __bool__(self):
+        return self.count > 0
+
+    def acquire(self, cls, *args):
+        # cls(*args) ile aynı, ama daha önce silinmiş bir nesne varsa onu yeniden kurar
+        recycled = self.free.get(cls)
+        if recycled:
+            entity = recycled.pop()
+            entity.__init__(*args)
+            return entity
+        return cls(*args)
+
+    def append(self, entity):
+        if self.count == len(self.items):
+            self.items.append(entity)
+        else:
+            self.items[self.count] = entity
+        entity.slot = self.count
+        self.count += 1
+
+    def remove(self, entity):
+        slot = entity.slot
+        self.count -= 1
+        last = self.items[self.count]
+        self.items[slot] = last
+        last.slot = slot
+        self.items[self.count] = None
+        if self.recycle:
+            self.free.setdefault(type(entity), []).append(entity)
+
+    def sweep(self):
+        # Canı bitenleri sil ve döndür. Baştan sona gidilir; silinen yerine gelen eleman da kontrol edilir.
+        removed = []
+        items = self.items
+        i = 0
+        while i < self.count:
+            entity = items[i]
+            if entity.health <= 0:
+                self.remove(entity)
+                removed.append(entity)
+            else:
+                i += 1
+        return removed
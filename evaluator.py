@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from fitness_cache import placement_key
+from game_classes import Game, ScorePruner, fps
+from metrics import MetricsSink
+
+# Çok güçlü bir yerleşim oyunu sonsuza kadar sürdürmesin: varsayılan olarak bir saatlik oyun süresi
+default_max_ticks = fps * 60 * 60
+
+
+def new_game(placement, game_params=None, sample_interval=None):
+    metrics = MetricsSink(interval=sample_interval, score_events=False) if sample_interval else None
+    game = Game(metrics)
+    for name, value in (game_params or {}).items():
+        setattr(game, name, value)  # Örn. {"money": 1000}
+    game.apply_placements(placement)
+    return game
+
+def placed_towers(placement, game_params=None):
+    # Yerleşimden baştan kurulan oyunun gerçekten aldığı kuleler (para yetmeyen, dolu ya da yasak
+    # hücreye düşenler çıkar); simülasyon sonucu istenen yerleşiminkiyle aynıdır
+    return new_game(placement, game_params).tower_placements
+
+def fitness_record(game, result):
+    result["placement"] = list(game.tower_placements)  # Gerçekten yerleşen kuleler
+    result["fitness"] = result["score"]
+    if game.metrics is not None:
+        result["samples"] = [sample._asdict() for sample in game.metrics.samples]
+    return result
+
+def evaluate_placement(placement, game_params=None, sample_interval=None,
+                       max_ticks=None, time_budget=None, threshold=None, prune_margin=None):
+    # Worker süreçlerinde çalışır: tek bir kule yerleşimini görüntüsüz simüle et
+    # sample_interval: verilirse bu kadar tick'te bir alınan örnekler sonuçta "samples" olarak döner
+    # threshold: max_ticks ile birlikte verilirse skoru bunu geçemeyeceği görülen oyun erken kesilir
+    # (bkz. ScorePruner; prune_margin verilirse kanıt yerine can eğrisinden tahmin edilen ufuk kullanılır)
+    prune = (ScorePruner(threshold, max_ticks, prune_margin)
+             if threshold is not None and max_ticks is not None else None)
+    game = new_game(placement, game_params, sample_interval)
+    result = game.play_game_instance(render=False, skip_ahead=True,  # Sessiz tick'leri atla
+                                     max_ticks=max_ticks, time_budget=time_budget, prune=prune)
+    return fitness_record(game, result)
+
+
+class FitnessEvaluator:
+    # Yerleşim listelerini süreç havuzunda paralel değerlendirir.
+    # Sonuçlar girdiyle aynı sırada döner; "with" bloğu sonunda havuz kapatılır.
+    # cache: fitness_cache.FitnessCache verilirse daha önce görülen yerleşimler simüle edilmez
+    # max_ticks / time_budget: oyun başına tick ve saniye sınırı
+    # prune_margin: threshold ile budamada kanıtlanabilir sınır yerine can eğrisinden tahmin edilen
+    # ufkun bu kadar katını kullan (bkz. ScorePruner); daha erken keser ama kazananı değiştirebilir
+    def __init__(self, workers=None, chunksize=None, game_params=None, sample_interval=None,
+                 cache=None, max_ticks=default_max_ticks, time_budget=None, prune_margin=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.game_params = dict(game_params or {})
+        self.sample_interval = sample_interval
+        self.cache = cache
+        self.max_ticks = max_ticks
+        self.time_budget = time_budget
+        self.prune_margin = prune_margin
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def evaluate(self, placements, threshold=None):
+        # threshold: şimdiye kadarki en iyi fitness; onu geçemeyeceği görülen oyunlar erken kesilir
+        # ("terminated": "pruned", skor o ana kadarki skordur). prune_margin verilmediyse geçebilecek
+        # olanların sonucu değişmez; verildiyse bu bir tahmindir ve nadiren yanlış kesebilir.
+        placements = [list(placement) for placement in placements]
+        if self.cache is None:
+            return self.simulate(placements, threshold)
+
+        # Önbellekte olmayan her farklı yerleşim bir kez simüle edilir. Anahtar gerçekten alınan
+        # kulelerdir, böylece aynı oyuna varan farklı yerleşimler de tekrar simüle edilmez.
+        placements = [placed_towers(placement, self.game_params) for placement in placements]
+        params = dict(self.game_params, sample_interval=self.sample_interval, max_ticks=self.max_ticks)
+        keys = [placement_key(placement, params) for placement in placements]
+        results, missing = {}, {}
+        for key, placement in zip(keys, placements):
+            if key not in results and key not in missing:
+                result = self.cache.get(key)
+                if result is None:
+                    missing[key] = placement
+                else:
+                    results[key] = result
+        computed = self.simulate(list(missing.values()), threshold)
+        # Kesilen ya da süresi dolan oyunların skoru gerçek fitness değildir, saklanmaz
+        self.cache.put_many((key, result) for key, result in zip(missing, computed)
+                            if result["terminated"] in (None, "max_ticks"))
+        results.update(zip(missing, computed))
+        return [dict(results[key]) for key in keys]
+
+    def simulate(self, placements, threshold=None):
+        task = partial(evaluate_placement, game_params=self.game_params, sample_interval=self.sample_interval,
+                       max_ticks=self.max_ticks, time_budget=self.time_budget, threshold=threshold,
+                       prune_margin=self.prune_margin)
+        if self.workers == 1 or len(placements) <= 1:
+            return [task(placement) for placement in placements]
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Her worker'a birkaç parça düşsün ki yavaş oyunlar yükü dengesizleştirmesin
+        chunksize = self.chunksize or max(1, len(placements) // (self.workers * 4))
+        return list(self.pool.map(task, placements, chunksize=chunksize))
+
+    def evaluate_one(self, placement, threshold=None):
+        return self.evaluate([placement], threshold)[0]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
@@ -0,0 +1,76 @@
+import json
+import sqlite3
+from collections import OrderedDict
+
+from game_classes import canonical_placements, compiled_map, rules_version
+
+
+def placement_key(placement, game_params=None):
+    # Aynı harita, aynı kurallar, aynı kule kümesi ve aynı oyun parametreleri aynı anahtarı verir;
+    # yerleşimin sırası ve tekrarları anahtarı değiştirmez
+    return json.dumps([
+        compiled_map.digest,
+        rules_version,
+        canonical_placements(placement),
+        sorted((game_params or {}).items()),
+    ], separators=(",", ":"))
+
+
+class FitnessCache:
+    # İki katmanlı sonuç önbelleği: bellekte sınırlı LRU, isteğe bağlı olarak diskte SQLite.
+    # path verilirse aynı yerleşimler farklı çalıştırmalarda da tekrar simüle edilmez.
+    def __init__(self, capacity=4096, path=None):
+        self.capacity = capacity
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS fitness (key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, key):
+        result = self.memory.get(key)
+        if result is not None:
+            self.memory.move_to_end(key)
+        elif self.db is not None:
+            row = self.db.execute("SELECT result FROM fitness WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                result = json.loads(row[0])
+                result["placement"] = [tuple(entry) for entry in result["placement"]]
+                self.remember(key, result)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(result)  # Çağıran sonucu değiştirse de önbellekteki kopya bozulmasın
+
+    def put(self, key, result):
+        self.remember(key, dict(result))
+        if self.db is not None:
+            self.db.execute("INSERT OR REPLACE INTO fitness (key, result) VALUES (?, ?)", (key, json.dumps(result)))
+
+    def put_many(self, items):
+        # Bir toplu değerlendirmenin sonuçlarını tek işlemde diske yaz
+        for key, result in items:
+            self.put(key, result)
+        if self.db is not None:
+            self.db.commit()
+
+    def remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)  # En uzun süredir kullanılmayanı at
+
+    def close(self):
+        if self.db is not None:
+            self.db.commit()
+            self.db.close()
+            self.db = None
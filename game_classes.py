@@ -1,7 +1,12 @@
-import pygame
-import json
-import sys
 import os
+import itertools
+import math
+import time
+from collections import OrderedDict
+
+from map_compiler import load_map
+from metrics import Sample
+from entity_pool import EntityPool
 """
 
 # Pygame başlatma ve ekran ayarları
@@ -985,10 +990,10 @@ class Mortar(Tower):
 
 """
 
-# Pygame başlatma ve ekran ayarları
-pygame.init()
+# Ekran ayarları (pencere ve pygame ilk çizimde init_display ile açılır)
+pygame = None
 screen_width, screen_height = 800, 600
-screen = pygame.display.set_mode((screen_width, screen_height))
+screen = None
 
 # Renk tanımları
 WHITE = (255, 255, 255)
@@ -1004,7 +1009,7 @@ TEAL = (0, 128, 128)
 BLACK = (0, 0, 0)
 
 # Zaman ve FPS ayarları
-clock = pygame.time.Clock()
+clock = None
 fps = 60
 
 # Grid ayarları
@@ -1012,81 +1017,291 @@ grid_size = 20
 grid_width = screen_width // grid_size
 grid_height = screen_height // grid_size
 
+def init_display():
+    # pygame'i ve pencereyi sadece bir şey çizileceği zaman başlat;
+    # simülasyon (worker süreçleri, testler) pygame olmadan çalışır
+    global pygame, screen, clock
+    if screen is None:
+        import pygame
+        pygame.init()
+        screen = pygame.display.set_mode((screen_width, screen_height))
+        clock = pygame.time.Clock()
+    return screen
+
+fonts = {}
+text_surfaces = OrderedDict()  # (metin, boyut, renk) -> çizilmiş yüzey, en son kullanılan sonda
+text_cache_size = 256
+
+def get_font(size):
+    font = fonts.get(size)
+    if font is None:
+        init_display()
+        font = fonts[size] = pygame.font.Font(None, size)
+    return font
+
+def render_text(text, size, color):
+    # Aynı metin tekrar tekrar çizilmesin; sadece değeri değişen metinler (skor, para) yeniden çizilir
+    key = (text, size, color)
+    surface = text_surfaces.get(key)
+    if surface is None:
+        surface = text_surfaces[key] = get_font(size).render(text, True, color)
+        if len(text_surfaces) > text_cache_size:
+            text_surfaces.popitem(last=False)  # En uzun süredir kullanılmayanı at
+    else:
+        text_surfaces.move_to_end(key)
+    return surface
+
 def draw_health_bar(screen, position, health, max_health, width, height):
-    pygame.draw.rect(screen, (128, 128, 128), (position[0], position[1] - 10, width, height))
+    bar_rect = pygame.draw.rect(screen, (128, 128, 128), (position[0], position[1] - 10, width, height))
     current_health_width = (health / max_health) * width
     pygame.draw.rect(screen, ORANGE, (position[0], position[1] - 10, current_health_width, height))
-
-def load_map_data(filename):
-    with open(filename, 'r') as file:
-        data = json.load(file)
-    return {(int(item[0]), int(item[1])): item[2] for item in data}
-
-def find_path_starts_and_ends(grid_data):
-    path_starts = {}
-    path_ends = {}
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-
-    for (x, y), color in grid_data.items():
-        if color == "grey":
-            neighbors = [(x + dx, y + dy) for dx, dy in directions]
-            neighbor_colors = [grid_data.get((x + dx, y + dy), "white") for dx, dy in directions]
-            if neighbor_colors.count("grey") == 1 and neighbor_colors.count("white") == 3:
-                path_starts[(x, y)] = True
-            if neighbor_colors.count("grey") == 1 and neighbor_colors.count("green") == 1 and neighbor_colors.count("white") == 2:
-                path_ends[(x, y)] = True
-
-    return path_starts, path_ends
-
-def find_paths(grid_data, path_starts):
-    visited = set()
-    paths = []
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-
-    def dfs(start):
-        stack = [start]
-        path = []
-        while stack:
-            current = stack.pop()
-            if current not in visited:
-                visited.add(current)
-                path.append(current)
-                for dx, dy in directions:
-                    neighbor = (current[0] + dx, current[1] + dy)
-                    if grid_data.get(neighbor, None) == 'grey' and neighbor not in visited:
-                        stack.append(neighbor)
-        return path
-
-    for start in path_starts:
-        if start not in visited:
-            path = dfs(start)
-            if path:
-                paths.append(path)
-
-    return paths
-
-map_data = load_map_data("map.json")
-grid_data = {(x // grid_size, y // grid_size): color for (x, y), color in map_data.items()}
-path_starts, path_ends = find_path_starts_and_ends(grid_data)
-paths = find_paths(grid_data, path_starts)
+    return bar_rect  # Çubuğun kapladığı alan (kirli dikdörtgen takibi için)
+
+map_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "map.json")
+# Izgara, yollar ve türetilmiş tablolar derlenmiş harita dosyasından okunur;
+# map.json sadece değiştiğinde yeniden ayrıştırılır (bkz. map_compiler)
+compiled_map = load_map(map_path, grid_size)
+map_data = compiled_map.map_data
+grid_data = compiled_map.grid_data
+path_starts, path_ends = compiled_map.path_starts, compiled_map.path_ends
+paths = compiled_map.paths
+main_tower_position = compiled_map.main_tower_position
+path_distances = compiled_map.path_distances  # Yol hücresi -> yolun sonuna kalan adım
 path_groups = [paths[i::3] for i in range(3)]
-
-def draw_paths(paths):
+path_cells = [cell for path in paths for cell in path]  # Düşmanların durabileceği tüm hücreler
+path_ids = {id(path): index for index, path in enumerate(paths)}  # Snapshot'larda yol nesnesi yerine sırası tutulur
+
+coverage_tables = {}
+
+def coverage_table(tower_class):
+    # Izgara hücresi -> o hücreye konan kulenin menzilindeki yol hücreleri.
+    # Düşmanlar sadece yol hücrelerinde durur ve kuleler yerleşince hareket etmez,
+    # bu yüzden tablo her kule türü için bir kez hesaplanır (ve diskte saklanır).
+    table = coverage_tables.get(tower_class)
+    if table is None:
+        table = coverage_tables[tower_class] = compiled_map.coverage(tower_class.attack_range)
+    return table
+
+def canonical_placements(placements):
+    # Yerleşimin sıradan ve tekrarlardan bağımsız tek biçimi (önbellek anahtarı ve yerleştirme sırası)
+    return sorted(set((tower_name, int(x), int(y)) for tower_name, x, y in placements))
+
+def score_upper_bound(game, enemies, shooters, max_ticks):
+    # max_ticks'e kadar ulaşılabilecek skorun kanıtlanabilir üst sınırı: zaman skoru en fazla
+    # 5 saniyede bir +2, artı öldürme skoru. Öldürülebilecekler şu an listedeki canlı düşmanlar
+    # (enemies: (skor, can) çiftleri) ve kalan sürede spawn takvimine göre doğabilecek düşmanlardır
+    # (100 sınırı yok sayılarak). Ama bir düşmanı öldürmek en az kalan canı kadar hasar ister ve
+    # binaların (shooters: sınıf -> adet) verebileceği hasar sınırlıdır; öldürme skoru bu hasar
+    # bütçesiyle alınabilecek en yüksek skoru (can başına skoru en yüksek olanlar önce) geçemez.
+    remaining = max(0, max_ticks - game.ticks)
+    time_score = 2 * (remaining // (5 * fps) + 1)
+    start, end = game.spawn_counter, game.spawn_counter + remaining
+
+    def spawns(*frequencies):  # (start, end] aralığında tüm frekansların katı olan tick sayısı
+        frequency = math.lcm(*frequencies)
+        return end // frequency - start // frequency
+
+    giant, archer, enemy = game.giant_spawn_frequency, game.archer_spawn_frequency, game.spawn_frequency
+    giants = spawns(giant)  # step() içindeki elif zinciriyle aynı öncelik: dev, okçu, düşman
+    archers = spawns(archer) - spawns(archer, giant)
+    basics = spawns(enemy) - spawns(enemy, archer) - spawns(enemy, giant) + spawns(enemy, archer, giant)
+    spawned = ((Giant, giants), (Archer, archers), (Enemy, basics))
+    targets = [(score / health, health) for score, health in enemies if health > 0]
+    targets.extend((cls.score_value / cls.max_health, count * cls.max_health) for cls, count in spawned if count)
+    budget = damage_capacity(shooters, remaining)
+    kill_score = 0
+    for ratio, health in sorted(targets, reverse=True):
+        taken = min(budget, health)
+        kill_score += ratio * taken
+        budget -= taken
+        if budget <= 0:
+            break
+    return game.score + time_score + kill_score
+
+def damage_capacity(shooters, ticks):
+    # ticks içinde verilebilecek hasarın üst sınırı: her bina bekleme süresi bitmiş sayılır, havan
+    # hem update() hem attack() ile iki kat hızlı bekler ve her atışta alanındaki tüm hücrelere vurur
+    total = 0
+    for cls, count in shooters.items():
+        if cls is MainTower:
+            period, damage = cls.cooldown_max + 1, cls.attack_power
+        elif issubclass(cls, Mortar):
+            period, damage = cls.reload_cooldown // 2 + 1, cls.damage * (2 * cls.splash_radius + 1) ** 2
+        else:
+            period, damage = cls.reload_cooldown + 1, cls.damage
+        total += count * damage * (ticks // period + 1)
+    return total
+
+def survival_horizon(ticks, health, max_ticks, margin):
+    # Ana kulenin can eğrisinden tahmini yıkılma tick'i, margin kat uzatılmış olarak. Ana kule
+    # iyileşmez ve gelen hasar oyun ilerledikçe artar (düşmanlar birikir, kuleler yıkılır); oyunun
+    # başından beri ortalama hasar hızı bu yüzden kalan ömrü genelde olduğundan uzun gösterir.
+    # Bu bir kanıt değil tahmindir: margin None ise (ya da henüz hasar yoksa) sınır max_ticks'tir.
+    lost = MainTower.max_health - health
+    if margin is None or lost <= 0:
+        return max_ticks
+    return min(max_ticks, ticks + math.ceil(margin * ticks * health / lost))
+
+class ScorePruner:
+    # Oyunun skoru threshold'u geçemeyecekse simülasyonu durdurur. Varsayılan (margin=None) sınır
+    # kanıtlanabilirdir: max_ticks'e kadarki skor üst sınırı, kesilen oyun threshold'u geçemezdi.
+    # margin verilirse ufuk ana kulenin can eğrisinden tahmin edilen yıkılma tick'inin margin katıdır
+    # (bkz. survival_horizon); çok daha erken keser ama bu bir tahmindir, isteğe bağlı açılır.
+    def __init__(self, threshold, max_ticks, margin=None):
+        self.threshold = threshold
+        self.max_ticks = max_ticks
+        self.margin = margin
+
+    def __call__(self, game):
+        return game.score_bound(self.max_ticks, self.margin) <= self.threshold
+
+def coverage_reach():
+    # Bir kulenin herhangi bir düşmanla etkileşebileceği en geniş alan: kule menzilleri ve
+    # okçu/dev saldırı menzillerinin en büyüğü
+    attack_range = max([cls.attack_range for cls in tower_classes.values()] +
+                       [cls.attack_range for cls in (Archer, Giant)])
+    return compiled_map.coverage(attack_range)
+
+def covered_cells(tower_class, x, y):
+    return coverage_table(tower_class).get((x, y), frozenset())
+
+# Hedef seçme stratejileri. Menzildeki canlı düşmanlardan anahtarı en küçük olan seçilir, eşitlikte en
+# eski düşman (en küçük serial) kazanır:
+#   "oldest": en önce doğan, "first": yolun sonuna en az adımı kalan (path_distances),
+#   "closest": binaya en yakın (kare mesafe), "strongest" / "weakest": canı en yüksek / en düşük
+target_strategies = ("oldest", "first", "closest", "strongest", "weakest")
+
+def cell_key(strategy, building, cell):
+    # "first" ve "closest" için anahtar sadece düşmanın hücresine bağlıdır
+    if strategy == "first":
+        return path_distances[cell]
+    return building.distance_squared(*cell)
+
+def target_key(strategy, building, enemy):
+    if strategy in ("first", "closest"):
+        key = cell_key(strategy, building, (enemy.x, enemy.y))
+    elif strategy == "strongest":
+        key = -enemy.health
+    elif strategy == "weakest":
+        key = enemy.health
+    else:
+        key = 0
+    return key, enemy.serial
+
+class TargetIndex:
+    # Bir binanın menzilindeki yol hücreleri üzerinde stratejiye göre hedef arama.
+    # "first" ve "closest" anahtarı sadece hücreye bağlıdır: hücreler anahtara göre gruplanıp sıralanır,
+    # arama ilk dolu grupta durur. Diğer stratejilerde menzildeki dolu hücreler taranır. Her iki durumda
+    # da kapsama ile dolu hücrelerden hangisi küçükse onun üzerinden dolaşılır.
+    __slots__ = ("strategy", "cells", "rank", "groups")
+
+    def __init__(self, building, cells):
+        if building.target_strategy not in target_strategies:
+            raise ValueError(f"Bilinmeyen hedef stratejisi: {building.target_strategy}")
+        self.strategy = building.target_strategy
+        self.cells = cells
+        self.rank = self.groups = None
+        if self.strategy in ("first", "closest"):
+            self.rank = {cell: cell_key(self.strategy, building, cell) for cell in cells}
+            groups = {}
+            for cell, key in self.rank.items():
+                groups.setdefault(key, []).append(cell)
+            self.groups = tuple(tuple(groups[key]) for key in sorted(groups))
+
+    def key(self, cell, enemy):
+        if self.rank is not None:
+            return self.rank[cell], enemy.serial
+        if self.strategy == "strongest":
+            return -enemy.health, enemy.serial
+        if self.strategy == "weakest":
+            return enemy.health, enemy.serial
+        return enemy.serial
+
+    def select(self, enemy_cells):
+        if self.groups is not None and len(self.cells) <= len(enemy_cells):
+            for cells in self.groups:
+                target = None
+                for cell in cells:
+                    for enemy in enemy_cells.get(cell, ()):
+                        if enemy.health > 0 and (target is None or enemy.serial < target.serial):
+                            target = enemy
+                if target is not None:
+                    return target
+            return None
+
+        if len(self.cells) < len(enemy_cells):
+            groups = ((cell, enemy_cells[cell]) for cell in self.cells if cell in enemy_cells)
+        else:
+            groups = ((cell, occupants) for cell, occupants in enemy_cells.items() if cell in self.cells)
+        target = best = None
+        for cell, occupants in groups:
+            for enemy in occupants:
+                if enemy.health > 0:
+                    key = self.key(cell, enemy)
+                    if target is None or key < best:
+                        target, best = enemy, key
+        return target
+
+target_indexes = {}
+
+def target_index(tower):
+    # Kule türü ve konumu aynıysa kapsama ve sıralama aynıdır; tüm oyunlar paylaşır
+    key = (type(tower), tower.x, tower.y)
+    index = target_indexes.get(key)
+    if index is None:
+        index = target_indexes[key] = TargetIndex(tower, covered_cells(type(tower), tower.x, tower.y))
+    return index
+
+splash_areas = {}
+
+def splash_area(radius, x, y):
+    # (x, y) merkezli (2r+1)x(2r+1) karedeki yol hücreleri, merkez hariç. Düşmanlar sadece yolda
+    # durduğu için alan hasarı bu hücrelerin enemy_cells listelerine bakar; maliyet düşman sayısına bağlı değildir.
+    key = (radius, x, y)
+    area = splash_areas.get(key)
+    if area is None:
+        area = splash_areas[key] = tuple(
+            (x + dx, y + dy)
+            for dx in range(-radius, radius + 1)
+            for dy in range(-radius, radius + 1)
+            if (dx != 0 or dy != 0) and (x + dx, y + dy) in path_distances
+        )
+    return area
+
+def draw_paths(paths, surface=None):
+    surface = screen if surface is None else surface
     for path in paths:
         for x, y in path:
             rect = pygame.Rect(x * grid_size, y * grid_size, grid_size, grid_size)
-            pygame.draw.rect(screen, GRAY, rect)
+            pygame.draw.rect(surface, GRAY, rect)
+
+background = None
+
+def background_surface():
+    # Harita (beyaz zemin ve gri yollar) hiç değişmez; bir kez çizilip her karede kopyalanır
+    global background
+    if background is None:
+        init_display()
+        background = pygame.Surface((screen_width, screen_height)).convert()
+        background.fill(WHITE)
+        for path_group in path_groups:
+            draw_paths(path_group, background)
+    return background
 
 class Game:
-    def __init__(self):
-        self.enemies = [
-            Enemy(path_groups[0][0]),
-            Archer(path_groups[1][0]),
-            Enemy(path_groups[2][0])
-        ]
-        self.towers = []
-        self.mortars = []
-        self.crossbow_towers = []
+    def __init__(self, metrics=None, profiler=None):
+        self.metrics = metrics  # İsteğe bağlı metrics.MetricsSink; None ise hiçbir şey kaydedilmez
+        self.profiler = profiler  # İsteğe bağlı profiler.TickProfiler; None ise faz süreleri ölçülmez
+        self.enemies = EntityPool(100, recycle=True)  # Spawn sınırı kadar yer baştan ayrılır
+        self.enemy_cells = {}  # Hücre -> o hücredeki düşmanlar (hareket çarpışma kontrolü için)
+        self.first_visits = {}  # Yol hücresi -> bir düşmanın o hücreye ilk girdiği tick
+        self.ticks = 0  # Simüle edilen tick sayısı
+        for enemy in (Enemy(path_groups[0][0]), Archer(path_groups[1][0]), Enemy(path_groups[2][0])):
+            self.add_enemy(enemy)
+        self.towers = EntityPool()
+        self.mortars = EntityPool()
+        self.crossbow_towers = EntityPool()
+        self.building_targets = {}  # Düşman türü -> yol hücresi -> menzildeki binalar, bkz. targets_in_range
         self.spawn_counter = 0
         self.score = 0
         self.money = 100  # Oyuncunun başlangıç parası
@@ -1095,171 +1310,602 @@ class Game:
         self.spawn_frequency = 150  # Her 2.5 saniyede bir spawn kontrolü
         self.archer_spawn_frequency = 4 * self.spawn_frequency  # Her 4 döngüde bir okçu doğurma
         self.giant_spawn_frequency = 8 * self.spawn_frequency  # Her 8 döngüde bir dev doğurma
-        self.main_tower_position = next((x // grid_size, y // grid_size) for (x, y), color in map_data.items() if color == "green")
+        self.main_tower_position = main_tower_position
         self.main_tower = MainTower(self.main_tower_position)
         self.tower_placements = []  # Yeni eklenen liste
+        self.destroyed_damage_dealt = 0  # Yıkılan kulelerin verdiği toplam hasar
+        self.score_timer = None  # (last_score_time, skorun artacağı tick) önbelleği
+        self.dirty_rects = None  # Son karede çizilen alanlar; None ise ekranın tamamı yeniden çizilir
+        self.history = []  # (tick, snapshot) kayıtları, bkz. play_game_instance(snapshot_interval=...)
+        self.terminated = None  # Oyun ana kule yıkılmadan durdurulduysa nedeni ("max_ticks", "time_budget", "pruned")
 
     def reset(self):
-        self.__init__()  # Oyunu sıfırlamak için tüm değişkenleri yeniden başlat
+        self.__init__(self.metrics, self.profiler)  # Oyunu sıfırlamak için tüm değişkenleri yeniden başlat
+        if self.metrics is not None:
+            self.metrics.restart()
+
+    def place_tower(self, tower_class, x, y):
+        # Harita dışı, yol üstü veya dolu hücreye ya da para yetmiyorsa yerleştirme
+        if not (0 <= x < grid_width and 0 <= y < grid_height) or (x, y) in grid_data:
+            return None
+        if any(t.x == x and t.y == y for t in self.buildings()):
+            return None
+        tower = tower_class(x, y)
+        if self.money < tower.cost:
+            return None
+        self.money -= tower.cost  # Kule yerleştirildiğinde para azaltılır
+        self.building_list(tower).append(tower)
+        self.building_targets = {}
+        self.tower_placements.append((tower_class.__name__, x, y))
+        return tower
+
+    def buildings(self):
+        # Saldırı ve hedef seçim sırasıyla tüm binalar: kuleler, havanlar, arbaletler
+        return itertools.chain(self.towers, self.mortars, self.crossbow_towers)
+
+    def targets_in_range(self, enemy):
+        # Düşmanın bulunduğu hücreden menzile giren binalar, saldırı sırasıyla (okçu için sonda ana kule).
+        # Tablo düşman türü başına bir kez kurulur ve sadece bina eklenince ya da yıkılınca yenilenir.
+        table = self.building_targets.get(type(enemy))
+        if table is None:
+            table = self.building_targets[type(enemy)] = self.building_index(type(enemy))
+        return table.get((enemy.x, enemy.y), ())
+
+    def building_index(self, enemy_class):
+        # Kapsama simetriktir: binanın hücresinden menzil kadar uzaktaki yol hücreleri, o binayı
+        # menzilinde gören düşman hücreleridir (karekökle yapılan mesafe kontrolüyle aynı sonuç)
+        coverage = compiled_map.coverage(enemy_class.attack_range)
+        targets = itertools.chain(self.buildings(), (self.main_tower,) if enemy_class.targets_main_tower else ())
+        table = {}
+        for building in targets:
+            for cell in coverage.get((building.x, building.y), ()):
+                table.setdefault(cell, []).append(building)
+        return table
+
+    def building_list(self, tower):
+        if isinstance(tower, Mortar):
+            return self.mortars
+        if isinstance(tower, CrossbowTower):
+            return self.crossbow_towers
+        return self.towers
+
+    def apply_placements(self, placements):
+        # placements: [("Tower", x, y), ("Mortar", x, y), ...]
+        # Sıra ve tekrarlar sonucu değiştirmesin diye kurallı sırayla yerleştirilir
+        for tower_name, x, y in canonical_placements(placements):
+            self.place_tower(tower_classes[tower_name], x, y)
+
+    def replace_placements(self, placements):
+        # Oyun ortasında yerleşimi değiştir: listede kalan kuleler durumlarını korur, yeniler sıfırdan
+        # kurulur. Hangi kulelerin alınacağı apply_placements'taki gibi kurallı sırayla, yerleştirme
+        # öncesi parayla (şimdiki para + alınmış tüm kulelerin parası) belirlenir; para yetmezse
+        # listede kalan kule de çıkarılır. Oyun başladıktan sonra kazanılan ödüller de bu paraya
+        # katıldığından resume listeyi önce 0. tick'teki snapshot'ta süzer.
+        buildings = {(type(b).__name__, b.x, b.y): b for b in self.buildings()}
+        kept = set(self.tower_placements) & set(placements)
+        for tower_name, x, y in self.tower_placements:
+            self.money += tower_classes[tower_name].cost  # Yıkılmış olsa da parası ödenmişti
+        self.towers, self.mortars, self.crossbow_towers = EntityPool(), EntityPool(), EntityPool()
+        self.building_targets = {}
+        self.tower_placements = []
+        used_cells = set()  # Yıkılmış kulelerin hücreleri de baştan kurulan oyundaki gibi dolu sayılır
+        for key in canonical_placements(placements):
+            tower_name, x, y = key
+            if (x, y) in used_cells:
+                continue
+            if key in kept:
+                if self.money < tower_classes[tower_name].cost:
+                    continue  # Baştan kurulan oyun bu kuleyi alamazdı
+                self.money -= tower_classes[tower_name].cost
+                building = buildings.get(key)
+                if building is not None:
+                    self.building_list(building).append(building)
+                    self.building_targets = {}
+                self.tower_placements.append(key)
+            else:
+                building = self.place_tower(tower_classes[tower_name], x, y)
+                if building is None:
+                    continue
+                # Baştan kurulan oyunda kule 0. tick'ten beri bekleme süresini (havan: kendine
+                # zararını) işletiyor olurdu; hedefsiz geçen bu tick'ler tek seferde işlenir
+                building.fast_forward(self.ticks)
+            used_cells.add((x, y))
+
+    def snapshot(self):
+        # Oyun durumunun sadece sayılardan oluşan değişmez kopyası; ucuza saklanır ve paylaşılır.
+        # Düşmanların yolu nesne yerine path_ids sırasıyla tutulur.
+        return (
+            (self.ticks, self.survival_time, self.last_score_time, self.score, self.money, self.spawn_counter,
+             self.spawn_frequency, self.archer_spawn_frequency, self.giant_spawn_frequency,
+             self.destroyed_damage_dealt),
+            (self.main_tower.health, self.main_tower.cooldown),
+            tuple((type(e).__name__, path_ids[id(e.path)], e.index, e.health, e.move_counter, e.attack_counter,
+                   e.serial) for e in self.enemies),
+            tuple(tuple((type(b).__name__, b.x, b.y, b.health, b.attack_cooldown, b.total_damage_dealt,
+                         getattr(b, "self_damage_cooldown", None)) for b in buildings)
+                  for buildings in (self.towers, self.mortars, self.crossbow_towers)),
+            tuple(self.tower_placements),
+        )
+
+    def restore(self, snapshot):
+        scalars, main_tower, enemies, buildings, placements = snapshot
+        (self.ticks, self.survival_time, self.last_score_time, self.score, self.money, self.spawn_counter,
+         self.spawn_frequency, self.archer_spawn_frequency, self.giant_spawn_frequency,
+         self.destroyed_damage_dealt) = scalars
+        self.main_tower_position = main_tower_position
+        self.main_tower = MainTower(self.main_tower_position)
+        self.main_tower.health, self.main_tower.cooldown = main_tower
+
+        self.enemies = EntityPool(100, recycle=True)
+        self.enemy_cells = {}
+        for name, path_id, index, health, move_counter, attack_counter, serial in enemies:
+            enemy = enemy_classes[name](paths[path_id])
+            enemy.index = index
+            enemy.x, enemy.y = enemy.path[index]
+            enemy.health = health
+            enemy.move_counter = move_counter
+            enemy.attack_counter = attack_counter
+            enemy.serial = serial
+            self.enemies.append(enemy)
+            self.enemy_cells.setdefault((enemy.x, enemy.y), []).append(enemy)
+
+        restored = []
+        for states in buildings:
+            restored.append(EntityPool())
+            for name, x, y, health, attack_cooldown, total_damage_dealt, self_damage_cooldown in states:
+                building = tower_classes[name](x, y)
+                building.health = health
+                building.attack_cooldown = attack_cooldown
+                building.total_damage_dealt = total_damage_dealt
+                if self_damage_cooldown is not None:
+                    building.self_damage_cooldown = self_damage_cooldown
+                restored[-1].append(building)
+        self.towers, self.mortars, self.crossbow_towers = restored
+        self.building_targets = {}
+        self.tower_placements = list(placements)
+        self.score_timer = None
+        self.dirty_rects = None
+        self.terminated = None
+
+    def fork(self, snapshot=None):
+        # Bu oyunun (ya da verilen snapshot'ın) bağımsız bir kopyası; metrik kaydı kopyalanmaz
+        game = Game.__new__(Game)
+        game.metrics = None
+        game.profiler = None
+        game.history = list(self.history)
+        game.first_visits = dict(self.first_visits)
+        game.restore(self.snapshot() if snapshot is None else snapshot)
+        return game
+
+    def resume(self, placements):
+        # Bu oyunun kaydından (history, first_visits) placements için yeni bir oyun kur. Oyun baştan
+        # oynatılmaz: değişen kulelerin hiçbir düşmanla etkileşemeyeceği son snapshot'tan devam edilir.
+        # Sonuç, placements ile baştan oynanan oyunla aynıdır.
+        if not self.history:
+            raise ValueError("resume: oyunun kaydı yok; play_game_instance(snapshot_interval=...) ile oynatın")
+        probe = self.fork(self.history[0][1])
+        probe.replace_placements(placements)
+        placements = probe.tower_placements  # Baştan kurulsaydı gerçekten yerleşecek olanlar
+
+        old, new = set(self.tower_placements), set(placements)
+        contact = math.inf
+        if [key for key in self.tower_placements if key in new] != [key for key in placements if key in old]:
+            contact = 0  # Kalan kulelerin sırası değişti; saldırı sırası baştan farklı olabilir
+        reach = coverage_reach()
+        for tower_name, x, y in old ^ new:
+            for cell in reach.get((x, y), ()):
+                contact = min(contact, self.first_visits.get(cell, math.inf))
+
+        # tick T'deki snapshot, T+1. tick'ten önceki durumdur; ilk etkileşim en erken 1. tick'te olur.
+        # Bina yıkılmış snapshot'lar kullanılmaz: yıkılan binanın yerine havuzun sonundaki geçtiği için
+        # saldırı sırası artık kurallı sıra değildir, replace_placements ise havuzları kurallı sırayla kurar.
+        usable = [entry for entry in self.history
+                  if entry[0] < max(contact, 1) and sum(map(len, entry[1][3])) == len(entry[1][4])]
+        if not usable:
+            raise ValueError("resume: kayıttaki ilk snapshot'tan önce bir bina yıkılmış ya da kuleler etkileşmiş")
+        tick, snapshot = usable[-1]
+        game = self.fork(snapshot)
+        game.history = [entry for entry in self.history if entry[0] <= tick]
+        game.first_visits = {cell: visit for cell, visit in self.first_visits.items() if visit <= tick}
+        game.replace_placements(placements)
+        return game
 
     def spawn_enemy(self):
         if len(self.enemies) < 100:
             path_index = len(self.enemies) % len(path_groups)
-            new_enemy = Enemy(path_groups[path_index][0])
-            self.enemies.append(new_enemy)
+            new_enemy = self.enemies.acquire(Enemy, path_groups[path_index][0])
+            self.add_enemy(new_enemy)
 
     def spawn_archer(self):
         if len(self.enemies) < 100:
             path_index = len(self.enemies) % len(path_groups)
-            new_archer = Archer(path_groups[path_index][0])
-            self.enemies.append(new_archer)
+            new_archer = self.enemies.acquire(Archer, path_groups[path_index][0])
+            self.add_enemy(new_archer)
 
     def spawn_giant(self):
         if len(self.enemies) < 100:
             path_index = len(self.enemies) % len(path_groups)
-            new_giant = Giant(path_groups[path_index][0])
-            self.enemies.append(new_giant)
+            new_giant = self.enemies.acquire(Giant, path_groups[path_index][0])
+            self.add_enemy(new_giant)
 
-    def draw_hud(self, generation=None):
-        font = pygame.font.Font(None, 36)
-        score_text = font.render(f"Score: {self.score}", True, BLACK)
-        money_text = font.render(f"Money: ${self.money}", True, BLACK)
-        screen.blit(score_text, (10, 10))
-        screen.blit(money_text, (10, 50))
+    def draw_hud(self, generation=None, speed=1):
+        score_text = render_text(f"Score: {self.score}", 36, BLACK)
+        money_text = render_text(f"Money: ${self.money}", 36, BLACK)
+        rects = [screen.blit(score_text, (10, 10)), screen.blit(money_text, (10, 50))]
         if generation is not None:
-            generation_text = font.render(f"Generation: {generation}", True, BLACK)
-            screen.blit(generation_text, (10, 90))
+            generation_text = render_text(f"Generation: {generation}", 36, BLACK)
+            rects.append(screen.blit(generation_text, (10, 90)))
+        if speed != 1:  # Hızlandırılmış oyun (None: olabildiğince hızlı)
+            speed_text = render_text("Speed: max" if speed is None else f"Speed: {speed}x", 36, BLACK)
+            rects.append(screen.blit(speed_text, (10, screen_height - 40)))
+        return rects
 
     def update_score(self):
         if self.survival_time - self.last_score_time >= 5:
             self.score += 2
             self.last_score_time = self.survival_time
-            print(f"Score increased: {self.score}, Survival Time: {self.survival_time}, Last Score Time: {self.last_score_time}")
-            print(f"Enemies: {len(self.enemies)}, Towers: {len(self.towers)}, Mortars: {len(self.mortars)}")
-            print(f"Crossbow Towers: {len(self.crossbow_towers)}, Main Tower Health: {self.main_tower.health}, Score: {self.score}, Money: ${self.money}\n")
-    
-    def play_game_instance(self):
-        iteration = 0  # İterasyon sayacı
+            if self.metrics is not None:
+                self.metrics.on_score(self)
+
+    def sample(self, event):
+        return Sample(self.ticks, event, self.survival_time, self.score, self.money, len(self.enemies),
+                      len(self.towers), len(self.mortars), len(self.crossbow_towers), self.main_tower.health)
+
+    def add_enemy(self, enemy):
+        self.enemies.append(enemy)
+        self.enemy_cells.setdefault((enemy.x, enemy.y), []).append(enemy)
+        self.first_visits.setdefault((enemy.x, enemy.y), self.ticks)
+
+    def remove_enemy(self, enemy):
+        self.enemies.remove(enemy)  # O(1): son düşman bunun yerine geçer
+        self.vacate_cell(enemy)
+
+    def vacate_cell(self, enemy):
+        occupants = self.enemy_cells[(enemy.x, enemy.y)]
+        occupants.remove(enemy)
+        if not occupants:
+            del self.enemy_cells[(enemy.x, enemy.y)]
+
+    def move_enemy(self, enemy, x, y):
+        self.vacate_cell(enemy)
+        enemy.x, enemy.y = x, y
+        self.enemy_cells.setdefault((x, y), []).append(enemy)
+        self.first_visits.setdefault((x, y), self.ticks)
+
+    def is_cell_occupied(self, x, y):
+        # Listede duran (ölü ama henüz silinmemiş dahil) herhangi bir düşman hücreyi kapatır
+        return (x, y) in self.enemy_cells
+
+    def remove_dead_entities(self):
+        # Tick sonundaki tek ölüm aşaması: o tick ölen tüm düşmanların skoru ve parası burada verilir,
+        # ölüler ve yıkılan binalar havuzlardan O(1) silinir. O zamana kadar ölüler hücrelerini kapatır.
+        for enemy in self.enemies.sweep():
+            self.score += enemy.score_value
+            self.money += enemy.reward
+            self.vacate_cell(enemy)
+        for pool in (self.towers, self.mortars, self.crossbow_towers):
+            for tower in pool.sweep():
+                self.destroyed_damage_dealt += tower.total_damage_dealt  # Hasar istatistiği kaybolmasın
+                self.building_targets = {}
+
+    def step(self):
+        # Oyun kurallarının tek bir tick'i (çizim yok)
+        profiler = self.profiler
+        self.ticks += 1
+        if profiler is not None:
+            profiler.begin(self.ticks)
+        self.survival_time += 1 / fps  # Hayatta kalınan süreyi artır
+        self.update_score()  # Skoru güncelle
+        if profiler is not None:
+            profiler.mark("score")
+
+        self.spawn_counter += 1
+
+        if self.spawn_counter % self.giant_spawn_frequency == 0:
+            self.spawn_giant()
+        elif self.spawn_counter % self.archer_spawn_frequency == 0:
+            self.spawn_archer()
+        elif self.spawn_counter % self.spawn_frequency == 0:
+            self.spawn_enemy()
+        if profiler is not None:
+            profiler.mark("spawn")
+
+        self.main_tower.attack(self.enemies, self.enemy_cells)
+        if profiler is not None:
+            profiler.mark("main_tower")
+        for tower in self.towers:
+            tower.attack(self.enemies, self.enemy_cells)
+        if profiler is not None:
+            profiler.mark("towers")
+        for mortar in self.mortars:
+            mortar.update()
+            mortar.attack(self.enemies, self.enemy_cells)
+        if profiler is not None:
+            profiler.mark("mortars")
+        for crossbow_tower in self.crossbow_towers:
+            crossbow_tower.attack(self.enemies, self.enemy_cells)
+        if profiler is not None:
+            profiler.mark("crossbows")
+        for enemy in self.enemies:
+            enemy.move(self)
+        if profiler is not None:
+            profiler.mark("enemies")
+
+        self.remove_dead_entities()
+        if profiler is not None:
+            profiler.mark("cleanup")
+
+        if self.metrics is not None:
+            self.metrics.on_tick(self)
+
+    def draw_frame(self, frame, generation=None):
+        # Simülasyon iş parçacığının yayınladığı kareyi çiz. Bu oyun sadece görüntüdür: durumu karedeki
+        # snapshot'tan kurulur, önceki karede çizilen alanlar korunur. Bu oyunun profiler'ı varsa
+        # çizim fazları (restore, draw, display) bu iş parçacığında ölçülür ve katmanda simülasyon
+        # fazlarının altında gösterilir.
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin(frame.tick)
+        dirty_rects = self.dirty_rects
+        self.restore(frame.snapshot)
+        self.dirty_rects = dirty_rects
+        if profiler is not None:
+            profiler.mark("restore")
+        overlay = list(frame.overlay or [])
+        if profiler is not None and profiler.overlay:
+            overlay.extend("render " + line for line in profiler.overlay_lines())
+        self.draw(generation, overlay or None, frame.speed)
+
+    def draw(self, generation=None, overlay=None, speed=1):
+        # Önceki karede çizilen alanlar arka plandan geri yüklenir, birimler yeniden çizilir
+        # ve ekrana sadece değişen dikdörtgenler gönderilir
+        init_display()
+        background = background_surface()
+        if self.dirty_rects is None:  # İlk kare (veya ekran başka bir şeyle boyandı): tamamını çiz
+            screen.blit(background, (0, 0))
+        else:
+            for rect in self.dirty_rects:
+                screen.blit(background, rect, rect)
+
+        rects = [self.main_tower.draw()]
+        for building in self.buildings():
+            rects.append(building.draw())
+        for enemy in self.enemies:
+            rect = enemy.draw()
+            if rect is not None:  # Ölü düşmanlar çizilmez
+                rects.append(rect)
+        rects.extend(self.draw_hud(generation, speed))
+        if overlay is None and self.profiler is not None and self.profiler.overlay:
+            overlay = self.profiler.overlay_lines()
+        if overlay:
+            rects.extend(self.draw_profiler_overlay(overlay))
+        rects = [rect.clip(screen.get_rect()) for rect in rects]  # Ekran dışına taşan can barları
+        if self.profiler is not None:
+            self.profiler.mark("draw")
+
+        if self.dirty_rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(self.dirty_rects + rects)
+        self.dirty_rects = rects
+        if self.profiler is not None:
+            self.profiler.mark("display")
+            self.profiler.end()  # FPS beklemesi tick süresine sayılmasın
+
+    def draw_profiler_overlay(self, lines):
+        # Sağ üst köşede faz başına ortalama süreler (F3 ile açılıp kapanır)
+        rects = []
+        for i, line in enumerate(lines):
+            text = render_text(line, 20, BLACK)
+            rects.append(screen.blit(text, (screen_width - text.get_width() - 10, 10 + i * 18)))
+        return rects
+
+    def results(self):
+        total_damage = self.destroyed_damage_dealt + sum(tower.total_damage_dealt for tower in self.buildings())
+        return {
+            "ticks": self.ticks,
+            "survival_time": self.survival_time,
+            "score": self.score,
+            "money": self.money,
+            "damage_dealt": total_damage,
+            "main_tower_health": self.main_tower.health,
+            "terminated": self.terminated,
+        }
+
+    def score_bound(self, max_ticks, margin=None):
+        shooters = {MainTower: 1}
+        for building in self.buildings():
+            shooters[type(building)] = shooters.get(type(building), 0) + 1
+        horizon = survival_horizon(self.ticks, self.main_tower.health, max_ticks, margin)
+        return score_upper_bound(self, [(enemy.score_value, enemy.health) for enemy in self.enemies],
+                                 shooters, horizon)
+
+    def score_idle_ticks(self):
+        # Skorun artacağı tick, survival_time'ın ondalık birikimiyle birebir aynı hesaplanır
+        if self.score_timer is None or self.score_timer[0] != self.last_score_time:
+            survival_time, ticks = self.survival_time, self.ticks
+            while True:
+                ticks += 1
+                survival_time += 1 / fps
+                if survival_time - self.last_score_time >= 5:
+                    break
+            self.score_timer = (self.last_score_time, ticks)
+        return self.score_timer[1] - self.ticks - 1
+
+    def idle_ticks(self):
+        # Hiçbir etkileşim olmadan, sadece sayaçların ilerleyeceği tick sayısı
+        idle = min(frequency - self.spawn_counter % frequency for frequency in
+                   (self.spawn_frequency, self.archer_spawn_frequency, self.giant_spawn_frequency)) - 1
+        idle = min(idle, self.score_idle_ticks())
+        for entity in itertools.chain((self.main_tower,), self.buildings(), self.enemies):
+            if idle == 0:
+                break
+            idle = min(idle, entity.idle_ticks(self))
+        return idle
+
+    def fast_forward(self, ticks):
+        # Sessiz tick'leri tek tek oynatmadan atla; sonuç adım adım oynatmakla aynıdır
+        self.ticks += ticks
+        self.spawn_counter += ticks
+        for _ in range(ticks):
+            self.survival_time += 1 / fps  # Ondalık birikim step() ile aynı kalsın
+        for entity in itertools.chain((self.main_tower,), self.buildings(), self.enemies):
+            entity.fast_forward(ticks)
+
+    def play_game_instance(self, render=True, skip_ahead=False, snapshot_interval=None,
+                           max_ticks=None, time_budget=None, prune=None):
+        # render=False: çizim ve FPS sınırı olmadan aynı kurallarla hızlı simülasyon
+        # skip_ahead=True: görüntüsüz modda sessiz tick'leri atlayıp bir sonraki olaya geç
+        # snapshot_interval: bu kadar tick'te bir (tick, snapshot) self.history'ye eklenir (bkz. resume)
+        # max_ticks: bu tick'te dur; time_budget: saniye cinsinden süre sınırı;
+        # prune(game) True dönerse dur (bkz. ScorePruner). Süre ve prune oyun saniyesinde bir kontrol edilir.
+        skip_ahead = skip_ahead and not render
+        self.terminated = None  # Önceki bir çalıştırmanın durma nedeni devam eden oyuna taşınmasın
+        if snapshot_interval:
+            if not self.history:
+                self.history.append((self.ticks, self.snapshot()))
+            next_snapshot = self.history[-1][0] + snapshot_interval
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        next_check = self.ticks + fps
         while self.main_tower.health > 0:
-            iteration += 1
-            self.survival_time += 1 / fps  # Hayatta kalınan süreyi artır
-            self.update_score()  # Skoru güncelle
-
-            if iteration % (fps * 20) == 0:  # 20 saniyede bir debug mesajı
-                print(f"Iteration: {iteration}, Enemies: {len(self.enemies)}, Towers: {len(self.towers)}, Mortars: {len(self.mortars)}")
-                print(f"Crossbow Towers: {len(self.crossbow_towers)}, Main Tower Health: {self.main_tower.health}, Score: {self.score}, Money: ${self.money}\n")
+            if max_ticks is not None and self.ticks >= max_ticks:
+                self.terminated = "max_ticks"
+                break
+            if skip_ahead:
+                idle = self.idle_ticks()
+                if max_ticks is not None:
+                    idle = min(idle, max_ticks - self.ticks)
+                if idle:
+                    self.fast_forward(idle)
+                if max_ticks is not None and self.ticks >= max_ticks:
+                    continue  # Döngü başında durulur
+            self.step()
+
+            if snapshot_interval and self.ticks >= next_snapshot:
+                self.history.append((self.ticks, self.snapshot()))
+                next_snapshot = self.ticks + snapshot_interval
+            if self.ticks >= next_check:
+                next_check = self.ticks + fps
+                if deadline is not None and time.perf_counter() > deadline:
+                    self.terminated = "time_budget"
+                    break
+                if prune is not None and prune(self):
+                    self.terminated = "pruned"
+                    break
 
-            self.enemies = [enemy for enemy in self.enemies if enemy.health > 0]
-            self.towers = [tower for tower in self.towers if tower.health > 0]
-            self.mortars = [mortar for mortar in self.mortars if mortar.health > 0]
-            self.crossbow_towers = [crossbow_tower for crossbow_tower in self.crossbow_towers if crossbow_tower.health > 0]
+            if render:
+                self.draw()
+                clock.tick(fps)
 
-            self.spawn_counter += 1
+        if self.profiler is not None:
+            self.profiler.end()  # Görüntüsüz döngüde son tick açık kalır
+        if self.metrics is not None:
+            self.metrics.on_end(self)
+        return self.results()
 
-            if self.spawn_counter % self.giant_spawn_frequency == 0:
-                self.spawn_giant()
-            elif self.spawn_counter % self.archer_spawn_frequency == 0:
-                self.spawn_archer()
-            elif self.spawn_counter % self.spawn_frequency == 0:
-                self.spawn_enemy()
-
-            self.main_tower.attack(self.enemies)
-            for tower in self.towers:
-                tower.attack(self.enemies)
-            for mortar in self.mortars:
-                mortar.update()
-                mortar.attack(self.enemies)
-            for crossbow_tower in self.crossbow_towers:
-                crossbow_tower.attack(self.enemies)
-            for enemy in self.enemies:
-                enemy.move(self)
-
-            screen.fill(WHITE)
-            for path_group in path_groups:
-                draw_paths(path_group)
-            self.main_tower.draw()
-            for tower in self.towers:
-                tower.draw()
-            for mortar in self.mortars:
-                mortar.draw()
-            for crossbow_tower in self.crossbow_towers:
-                crossbow_tower.draw()
-            for enemy in self.enemies:
-                enemy.draw()
-
-            self.draw_hud()
-            pygame.display.update()
-            clock.tick(fps)
+enemy_serials = itertools.count()
 
+# Birim sınıfları: türe ait sabitler (can üst sınırı, menzil, maliyet, ödül...) sınıf özelliği olarak
+# bir kez tutulur, örneklerde sadece __slots__'taki değişen durum bulunur (örnek başına __dict__ yok)
 class MainTower:
+    __slots__ = ("x", "y", "health", "cooldown", "coverage")
+    size = grid_size * 3  # Kule boyutu (3x3 grid)
+    max_health = 1000  # Maksimum sağlık
+    damage_radius = 3 * grid_size + size / 2  # Saldırı yarıçapı (menzil)
+    attack_power = 25  # Saldırı gücü
+    cooldown_max = 90  # Maksimum bekleme süresi
+    target_strategy = "closest"  # Hedef seçme stratejisi (bkz. target_strategies)
+
     def __init__(self, position):
         self.x, self.y = position  # Kule konumu (x, y)
-        self.size = grid_size * 3  # Kule boyutu (3x3 grid)
-        self.health = 1000  # Kule sağlığı
-        self.max_health = 1000  # Maksimum sağlık
-        self.damage_radius = 3 * grid_size + self.size / 2  # Saldırı yarıçapı (menzil)
-        self.attack_power = 25  # Saldırı gücü
+        self.health = self.max_health  # Kule sağlığı
         self.cooldown = 0  # Saldırı bekleme süresi
-        self.cooldown_max = 90  # Maksimum bekleme süresi
+        self.coverage = None  # Menzildeki yol hücreleri için TargetIndex (ilk saldırıda oluşturulur)
 
     def draw(self):
         tower_start_x = self.x * grid_size  # Kule başlangıç x konumu
         tower_start_y = self.y * grid_size  # Kule başlangıç y konumu
         rect = pygame.Rect(tower_start_x, tower_start_y, self.size, self.size)  # Kule dikdörtgeni
         pygame.draw.rect(screen, GREEN, rect)  # Kuleyi ekrana çiz
-        draw_health_bar(screen, (tower_start_x, tower_start_y - 10), self.health, self.max_health, self.size, 5)  # Sağlık barını çiz
+        bar_rect = draw_health_bar(screen, (tower_start_x, tower_start_y - 10), self.health, self.max_health, self.size, 5)  # Sağlık barını çiz
+        return rect.union(bar_rect)  # Ekranda değişen alan
 
-    def attack(self, enemies):
-        if self.cooldown == 0:  # Bekleme süresi sıfırsa saldır
-            tower_center_x = self.x * grid_size + self.size / 2  # Kule merkez x konumu
-            tower_center_y = self.y * grid_size + self.size / 2  # Kule merkez y konumu
+    def distance_squared(self, x, y):
+        # Kule merkezi ile (x, y) hücresindeki düşmanın merkezi arasındaki mesafenin karesi
+        # (tüm düşmanlar grid_size genişliğinde)
+        return ((self.x * grid_size + self.size / 2 - (x * grid_size + grid_size / 2)) ** 2 +
+                (self.y * grid_size + self.size / 2 - (y * grid_size + grid_size / 2)) ** 2)
 
-            for enemy in enemies:  # Düşmanları kontrol et
-                if self.health > 0 and enemy.health > 0:  # Kule ve düşman sağlığı pozitif ise
-                    enemy_center_x = enemy.x * grid_size + enemy.width / 2  # Düşman merkez x konumu
-                    enemy_center_y = enemy.y * grid_size + enemy.height / 2  # Düşman merkez y konumu
-                    distance = ((tower_center_x - enemy_center_x) ** 2 + (tower_center_y - enemy_center_y) ** 2) ** 0.5  # Kule ve düşman arasındaki mesafe
-                    if distance <= self.damage_radius:  # Düşman menzil içindeyse
-                        enemy.health -= self.attack_power  # Düşmana hasar ver
-                        if enemy.health < 0:
-                            enemy.health = 0  # Sağlık sıfırın altına düşerse sıfırla
-                        self.cooldown = self.cooldown_max  # Saldırı sonrası bekleme süresini başlat
-                        break  # İlk düşmana saldırdıktan sonra döngüden çık
+    def find_target(self, enemies, enemy_cells=None):
+        # Menzildeki canlı düşmanlardan target_strategy'ye göre hedefi bul
+        if self.health <= 0:
+            return None
+        if enemy_cells is not None:  # Kapsama tablosu ile hızlı hedef seçimi
+            if self.coverage is None:
+                cells = frozenset(cell for cell in path_cells if self.distance_squared(*cell) <= self.damage_radius ** 2)
+                self.coverage = TargetIndex(self, cells)
+            return self.coverage.select(enemy_cells)
+
+        reach = self.damage_radius ** 2
+        candidates = [enemy for enemy in enemies if enemy.health > 0 and self.distance_squared(enemy.x, enemy.y) <= reach]
+        return min(candidates, key=lambda enemy: target_key(self.target_strategy, self, enemy), default=None)
+
+    def attack(self, enemies, enemy_cells=None):
+        if self.cooldown == 0:  # Bekleme süresi sıfırsa saldır
+            enemy = self.find_target(enemies, enemy_cells)
+            if enemy is not None:
+                enemy.health -= self.attack_power  # Düşmana hasar ver
+                if enemy.health < 0:
+                    enemy.health = 0  # Sağlık sıfırın altına düşerse sıfırla
+                self.cooldown = self.cooldown_max  # Saldırı sonrası bekleme süresini başlat
         else:
             self.cooldown -= 1  # Bekleme süresini azalt
 
+    def idle_ticks(self, game):
+        # Menzilde düşman yoksa, biri hareket edene kadar (o da bir olay) hiçbir şey yapmaz
+        if self.find_target(game.enemies, game.enemy_cells) is None:
+            return math.inf
+        return self.cooldown
+
+    def fast_forward(self, ticks):
+        self.cooldown = max(0, self.cooldown - ticks)
+
 class Enemy:
+    __slots__ = ("slot", "serial", "path", "index", "x", "y", "health", "move_counter", "attack_counter")
+    width = grid_size  # Düşmanın genişliği
+    height = grid_size  # Düşmanın yüksekliği
+    max_health = 60  # Düşmanın maksimum sağlığı
+    move_frequency = 45  # Hareket frekansı
+    attack_frequency = 40  # Saldırı frekansı
+    damage = 10  # Verilen hasar
+    color = RED  # Düşmanın rengi
+    reward = 15  # Öldürüldüğünde verilen para miktarı
+    score_value = 10  # Öldürüldüğünde verilen skor miktarı
+
     def __init__(self, path):
+        self.serial = next(enemy_serials)  # Oluşma sırası (listedeki sırayla aynı)
         self.path = path  # Düşmanın izleyeceği yol
         self.index = 0  # Yol üzerinde geçerli indeks
         self.x, self.y = self.path[self.index]  # Geçerli konum
-        self.width = grid_size  # Düşmanın genişliği
-        self.height = grid_size  # Düşmanın yüksekliği
-        self.health = 60  # Düşmanın sağlığı
-        self.max_health = 60  # Düşmanın maksimum sağlığı
+        self.health = self.max_health  # Düşmanın sağlığı
         self.move_counter = 0  # Hareket sayacı
-        self.move_frequency = 45  # Hareket frekansı
         self.attack_counter = 0  # Saldırı sayacı
-        self.attack_frequency = 40  # Saldırı frekansı
-        self.damage = 10  # Verilen hasar
-        self.color = RED  # Düşmanın rengi
-        self.reward = 15  # Öldürüldüğünde verilen para miktarı
-        self.score_value = 10  # Öldürüldüğünde verilen skor miktarı
 
     def draw(self):
         if self.health > 0:
             rect = pygame.Rect(self.x * grid_size, self.y * grid_size, self.width, self.height)  # Düşmanın dikdörtgeni
             pygame.draw.rect(screen, self.color, rect)  # Düşmanı ekrana çiz
-            draw_health_bar(screen, (self.x * grid_size, self.y * grid_size - 20), self.health, self.max_health, self.width, 5)  # Sağlık barını çiz
+            bar_rect = draw_health_bar(screen, (self.x * grid_size, self.y * grid_size - 20), self.health, self.max_health, self.width, 5)  # Sağlık barını çiz
+            return rect.union(bar_rect)  # Ekranda değişen alan
 
     def move(self, game):
         if self.health > 0 and self.index < len(self.path) - 1:
             self.move_counter += 1
             if self.move_counter >= self.move_frequency:
                 next_x, next_y = self.path[self.index + 1]
-                if not any(enemy.x == next_x and enemy.y == next_y for enemy in game.enemies if enemy is not self):
+                if not game.is_cell_occupied(next_x, next_y):
                     self.index += 1
-                    self.x, self.y = next_x, next_y  # Konumu güncelle
+                    game.move_enemy(self, next_x, next_y)  # Konumu güncelle
                     self.move_counter = 0
 
         if self.health > 0 and self.index >= len(self.path) - 1:
@@ -1271,38 +1917,45 @@ class Enemy:
                     return
                 self.attack_counter = 0
 
+    def idle_ticks(self, game):
+        # Bir sonraki hareket/saldırıya kadar sadece sayaçların ilerleyeceği tick sayısı
         if self.health <= 0:
-            game.score += self.score_value
-            game.money += self.reward
-            game.enemies.remove(self)
+            return 0
+        if self.index < len(self.path) - 1:
+            if game.is_cell_occupied(*self.path[self.index + 1]):
+                return math.inf  # Önündeki hücre ancak bir olayla boşalır
+            return max(0, self.move_frequency - 1 - self.move_counter)
+        return max(0, self.attack_frequency - 1 - self.attack_counter)
+
+    def fast_forward(self, ticks):
+        if self.index < len(self.path) - 1:
+            self.move_counter += ticks
+        else:
+            self.attack_counter += ticks
 
 class Archer(Enemy):
-    def __init__(self, path):
-        super().__init__(path)
-        self.attack_range = 4 * grid_size  # Saldırı menzili
-        self.color = PURPLE  # Renk
-        self.attack_power = 25  # Saldırı gücü
-        self.health = 120  # Sağlık
-        self.max_health = 120  # Maksimum sağlık
-        self.attack_counter = 0  # Saldırı sayacı
-        self.attack_frequency = 60  # Saldırı frekansı
-        self.move_frequency = 60  # Hareket frekansı
-        self.reward = 40  # Öldürüldüğünde verilen para miktarı
-        self.score_value = 25  # Öldürüldüğünde verilen skor miktarı
+    __slots__ = ()
+    attack_range = 4 * grid_size  # Saldırı menzili
+    color = PURPLE  # Renk
+    attack_power = 25  # Saldırı gücü
+    max_health = 120  # Maksimum sağlık
+    attack_frequency = 60  # Saldırı frekansı
+    move_frequency = 60  # Hareket frekansı
+    reward = 40  # Öldürüldüğünde verilen para miktarı
+    score_value = 25  # Öldürüldüğünde verilen skor miktarı
+    targets_main_tower = True  # Menzildeki ana kuleye de saldırır
 
     def move(self, game):
         global score, money
         if self.health > 0 and self.index < len(self.path) - 1:
             target_hit = False
-            combined_targets = game.towers + game.mortars + game.crossbow_towers + [game.main_tower]  # Tüm hedefler
-            for target in combined_targets:
-                if self.is_in_attack_range(target):
-                    if self.attack_counter == 0:
-                        self.attack([target])  # Hedefe saldır
-                        if target.health <= 0:
-                            target_hit = True
-                        self.attack_counter = self.attack_frequency
-                    break
+            targets = game.targets_in_range(self)  # Menzildeki binalar ve ana kule
+            if targets and self.attack_counter == 0:
+                target = targets[0]  # İlk hedef
+                self.attack([target])  # Hedefe saldır
+                if target.health <= 0:
+                    target_hit = True
+                self.attack_counter = self.attack_frequency
 
             if target_hit:
                 pass  # Hedef vurulduysa hareketsiz kal
@@ -1311,19 +1964,13 @@ class Archer(Enemy):
                     self.move_counter += 1
                     if self.move_counter >= self.move_frequency:
                         next_x, next_y = self.path[self.index + 1]
-                        if not any(enemy.x == next_x and enemy.y == next_y for enemy in game.enemies if enemy is not self):
+                        if not game.is_cell_occupied(next_x, next_y):
                             self.index += 1
-                            self.x, self.y = next_x, next_y  # Konumu güncelle
+                            game.move_enemy(self, next_x, next_y)  # Konumu güncelle
                             self.move_counter = 0
         if self.attack_counter > 0:
             self.attack_counter -= 1  # Saldırı süresini azalt
 
-        if self.health <= 0:
-            game.score += self.score_value
-            game.money += self.reward
-            game.enemies.remove(self)
-
-
 
     def is_in_attack_range(self, target):
         distance = ((self.x * grid_size - target.x * grid_size) ** 2 +
@@ -1337,40 +1984,56 @@ class Archer(Enemy):
                 if target.health <= 0:
                     target.health = 0  # Hedefin sağlığını sıfırla
 
+    def idle_ticks(self, game):
+        if self.health <= 0:
+            return 0
+        if self.index >= len(self.path) - 1:
+            return math.inf  # Yolun sonunda okçu sadece sayacını azaltır
+        if game.targets_in_range(self):
+            return self.attack_counter  # Sayaç bitince menzildeki binaya saldırır
+        if game.is_cell_occupied(*self.path[self.index + 1]):
+            return math.inf
+        # Önce saldırı sayacı biter, sonra hareket sayacı işlemeye başlar
+        return self.attack_counter + max(1, self.move_frequency - self.move_counter) - 1
+
+    def fast_forward(self, ticks):
+        waiting = min(self.attack_counter, ticks)
+        self.attack_counter -= waiting
+        if self.index < len(self.path) - 1:
+            self.move_counter += ticks - waiting
+
 class Giant(Enemy):
-    def __init__(self, path):
-        super().__init__(path)
-        self.attack_range = 1 * grid_size  # Saldırı menzili
-        self.color = ORANGE  # Renk
-        self.attack_power = 75  # Saldırı gücü
-        self.health = 400  # Sağlık
-        self.max_health = 400  # Maksimum sağlık
-        self.move_frequency = 75  # Hareket frekansı
-        self.attack_frequency = 120  # Saldırı frekansı
-        self.reward = 80  # Öldürüldüğünde verilen para miktarı
-        self.score_value = 60  # Öldürüldüğünde verilen skor miktarı
+    __slots__ = ()
+    attack_range = 1 * grid_size  # Saldırı menzili
+    color = ORANGE  # Renk
+    attack_power = 75  # Saldırı gücü
+    max_health = 400  # Maksimum sağlık
+    move_frequency = 75  # Hareket frekansı
+    attack_frequency = 120  # Saldırı frekansı
+    reward = 80  # Öldürüldüğünde verilen para miktarı
+    score_value = 60  # Öldürüldüğünde verilen skor miktarı
+    targets_main_tower = False  # Ana kuleye sadece yolun sonunda saldırır
 
     def draw(self):
         if self.health > 0:
             rect = pygame.Rect(self.x * grid_size, self.y * grid_size, self.width, self.height)  # Dikdörtgeni tanımla
             pygame.draw.rect(screen, self.color, rect)  # Ekrana çiz
-            draw_health_bar(screen, (self.x * grid_size, self.y * grid_size - 20), self.health, self.max_health, self.width, 5)  # Sağlık barını çiz
+            bar_rect = draw_health_bar(screen, (self.x * grid_size, self.y * grid_size - 20), self.health, self.max_health, self.width, 5)  # Sağlık barını çiz
+            return rect.union(bar_rect)  # Ekranda değişen alan
 
     def move(self, game):
         if self.health > 0:
             if self.index < len(self.path) - 1:
                 target_hit = False
-                combined_targets = game.towers + game.mortars + game.crossbow_towers  # Tüm hedefler
-
-                # Hedef menzilde mi kontrol et
-                for target in combined_targets:
-                    if self.is_in_attack_range(target):
-                        if self.attack_counter == 0:
-                            self.attack([target])  # Hedefe saldır
-                            if target.health <= 0:
-                                target_hit = True
-                            self.attack_counter = self.attack_frequency
-                        break
+                targets = game.targets_in_range(self)  # Menzildeki binalar
+
+                # Menzilde hedef varsa ilkine saldır
+                if targets and self.attack_counter == 0:
+                    target = targets[0]
+                    self.attack([target])  # Hedefe saldır
+                    if target.health <= 0:
+                        target_hit = True
+                    self.attack_counter = self.attack_frequency
 
                 # Hedef menzilde değilse hareket et
                 if not target_hit:
@@ -1378,9 +2041,9 @@ class Giant(Enemy):
                         self.move_counter += 1
                         if self.move_counter >= self.move_frequency:
                             next_x, next_y = self.path[self.index + 1]
-                            if not any(enemy.x == next_x and enemy.y == next_y for enemy in game.enemies if enemy is not self):
+                            if not game.is_cell_occupied(next_x, next_y):
                                 self.index += 1
-                                self.x, self.y = next_x, next_y  # Konumu güncelle
+                                game.move_enemy(self, next_x, next_y)  # Konumu güncelle
                                 self.move_counter = 0
 
             # Saldırı süresini azalt
@@ -1396,11 +2059,6 @@ class Giant(Enemy):
                         return
                     self.attack_counter = self.attack_frequency
 
-        if self.health <= 0:
-            game.score += self.score_value
-            game.money += self.reward
-            game.enemies.remove(self)
-
     def is_in_attack_range(self, target):
         # Hedefin menzilde olup olmadığını kontrol et
         distance = ((self.x * grid_size - target.x * grid_size) ** 2 +
@@ -1415,129 +2073,201 @@ class Giant(Enemy):
                 if target.health <= 0:
                     target.health = 0  # Hedefin sağlığını sıfırla
 
+    def idle_ticks(self, game):
+        if self.health <= 0:
+            return 0
+        if self.index >= len(self.path) - 1:
+            return max(0, self.attack_counter - 1)  # Sayaç bitince ana kuleye saldırır
+        if game.targets_in_range(self):
+            return self.attack_counter  # Sayaç bitince menzildeki binaya saldırır
+        if game.is_cell_occupied(*self.path[self.index + 1]):
+            return math.inf
+        # Önce saldırı sayacı biter, sonra hareket sayacı işlemeye başlar
+        return self.attack_counter + max(1, self.move_frequency - self.move_counter) - 1
+
+    def fast_forward(self, ticks):
+        waiting = min(self.attack_counter, ticks)
+        self.attack_counter -= waiting
+        if self.index < len(self.path) - 1:
+            self.move_counter += ticks - waiting
+
 class Tower:
+    __slots__ = ("slot", "x", "y", "health", "attack_cooldown", "total_damage_dealt", "coverage")
+    size = grid_size  # Kule boyutu
+    max_health = 200  # Maksimum sağlık
+    damage = 25  # Kule hasarı
+    attack_range = 4 * grid_size  # Saldırı menzili
+    start_cooldown = 60  # Yerleştirildikten sonraki ilk bekleme süresi
+    reload_cooldown = 60  # Her saldırıdan sonraki bekleme süresi
+    cost = 50  # Kule maliyeti
+    target_strategy = "first"  # Yola en çok ilerlemiş düşmanı vur (bkz. target_strategies)
+
     def __init__(self, x, y):
         self.x = x  # Kule konumu x
         self.y = y  # Kule konumu y
-        self.size = grid_size  # Kule boyutu
-        self.health = 200  # Kule sağlığı
-        self.max_health = 200  # Maksimum sağlık
-        self.damage = 25  # Kule hasarı
-        self.attack_range = 4 * grid_size  # Saldırı menzili
-        self.attack_cooldown = 60  # Saldırı bekleme süresi
-        self.cost = 50  # Kule maliyeti
+        self.health = self.max_health  # Kule sağlığı
+        self.attack_cooldown = self.start_cooldown  # Saldırı bekleme süresi
         self.total_damage_dealt = 0  # Toplam verilen hasar
+        self.coverage = None  # Menzildeki yol hücreleri için TargetIndex (ilk saldırıda oluşturulur)
 
     def draw(self):
         rect = pygame.Rect(self.x * grid_size, self.y * grid_size, self.size, self.size)  # Kule dikdörtgeni
         pygame.draw.rect(screen, BLUE, rect)  # Kuleyi ekrana çiz
-        draw_health_bar(screen, (self.x * grid_size, self.y * grid_size - 20), self.health, self.max_health, self.size, 5)  # Sağlık barını çiz
-
-    def attack(self, enemies):
+        bar_rect = draw_health_bar(screen, (self.x * grid_size, self.y * grid_size - 20), self.health, self.max_health, self.size, 5)  # Sağlık barını çiz
+        return rect.union(bar_rect)  # Ekranda değişen alan
+
+    def distance_squared(self, x, y):
+        # Kapsama tablosuyla aynı ölçü: kule ve düşman hücrelerinin köşeleri arası mesafenin karesi
+        return ((self.x - x) * grid_size) ** 2 + ((self.y - y) * grid_size) ** 2
+
+    def find_target(self, enemies, enemy_cells=None):
+        # Menzildeki canlı düşmanlardan türün target_strategy'sine göre hedefi bul
+        if enemy_cells is not None:
+            if self.coverage is None:
+                self.coverage = target_index(self)
+            return self.coverage.select(enemy_cells)
+        reach = self.attack_range ** 2
+        candidates = [enemy for enemy in enemies if enemy.health > 0 and self.distance_squared(enemy.x, enemy.y) <= reach]
+        return min(candidates, key=lambda enemy: target_key(self.target_strategy, self, enemy), default=None)
+
+    def attack(self, enemies, enemy_cells=None):
         if self.attack_cooldown == 0:
-            for enemy in enemies:
-                if enemy.health > 0:
-                    distance = ((self.x * grid_size - enemy.x * grid_size) ** 2 +
-                                (self.y * grid_size - enemy.y * grid_size) ** 2) ** 0.5  # Hedefe olan mesafeyi hesapla
-                    if distance <= self.attack_range:
-                        enemy.health -= self.damage  # Hedefin sağlığını azalt
-                        self.total_damage_dealt += self.damage  # Toplam verilen hasarı güncelle
-                        if enemy.health <= 0:
-                            enemy.health = 0  # Hedefin sağlığını sıfırla
-                        self.attack_cooldown = 60  # Saldırı bekleme süresini sıfırla
-                        break  # İlk hedefe saldırdıktan sonra döngüden çık
+            enemy = self.find_target(enemies, enemy_cells)
+            if enemy is not None:
+                enemy.health -= self.damage  # Hedefin sağlığını azalt
+                self.total_damage_dealt += self.damage  # Toplam verilen hasarı güncelle
+                if enemy.health <= 0:
+                    enemy.health = 0  # Hedefin sağlığını sıfırla
+                self.attack_cooldown = self.reload_cooldown  # Saldırı bekleme süresini sıfırla
         else:
             self.attack_cooldown -= 1  # Saldırı bekleme süresini azalt
 
+    def idle_ticks(self, game):
+        if self.health <= 0:
+            return 0
+        if self.find_target(game.enemies, game.enemy_cells) is None:
+            return math.inf  # Menzile bir düşman ancak bir olayla girer
+        return self.attack_cooldown
+
+    def fast_forward(self, ticks):
+        self.attack_cooldown = max(0, self.attack_cooldown - ticks)
+
 class CrossbowTower(Tower):
-    def __init__(self, x, y):
-        super().__init__(x, y)
-        self.damage = 3  # Hasar değeri
-        self.attack_range = 2 * grid_size  # Saldırı menzili
-        self.attack_cooldown = 15  # Saldırı bekleme süresi
-        self.color = LIGHT_BLUE  # Renk
-        self.cost = 25  # Arbalet kulesi maliyeti
-        self.health = 80  # Sağlık
-        self.max_health = 80  # Maksimum sağlık
+    __slots__ = ()
+    damage = 3  # Hasar değeri
+    attack_range = 2 * grid_size  # Saldırı menzili
+    start_cooldown = 15  # İlk bekleme süresi
+    reload_cooldown = 10  # Saldırı sonrası bekleme süresi
+    color = LIGHT_BLUE  # Renk
+    cost = 25  # Arbalet kulesi maliyeti
+    target_strategy = "weakest"  # Az hasarlı hızlı atışlarla yaralıları bitir
+    max_health = 80  # Maksimum sağlık
 
     def draw(self):
         rect = pygame.Rect(self.x * grid_size, self.y * grid_size, self.size, self.size)  # Kule dikdörtgeni
         pygame.draw.rect(screen, self.color, rect)  # Kuleyi ekrana çiz
-        draw_health_bar(screen, (self.x * grid_size, self.y * grid_size - 20), self.health, self.max_health, self.size, 5)  # Sağlık barını çiz
+        bar_rect = draw_health_bar(screen, (self.x * grid_size, self.y * grid_size - 20), self.health, self.max_health, self.size, 5)  # Sağlık barını çiz
+        return rect.union(bar_rect)  # Ekranda değişen alan
 
-    def attack(self, enemies):
+    def attack(self, enemies, enemy_cells=None):
         if self.attack_cooldown == 0:  # Bekleme süresi sıfırsa saldır
-            for enemy in enemies:  # Düşmanları kontrol et
-                if enemy.health > 0:  # Düşman sağlığı pozitif ise
-                    distance = ((self.x * grid_size - enemy.x * grid_size) ** 2 +
-                                (self.y * grid_size - enemy.y * grid_size) ** 2) ** 0.5  # Kule ve düşman arasındaki mesafe
-                    if distance <= self.attack_range:  # Düşman menzil içindeyse
-                        enemy.health -= self.damage  # Düşmana hasar ver
-                        self.total_damage_dealt += self.damage  # Toplam verilen hasarı güncelle
-                        if enemy.health <= 0:
-                            enemy.health = 0  # Sağlık sıfırın altına düşerse sıfırla
-                        self.attack_cooldown = 10  # Saldırı sonrası bekleme süresini başlat
-                        break  # İlk düşmana saldırdıktan sonra döngüden çık
+            enemy = self.find_target(enemies, enemy_cells)  # Menzildeki ilk düşman
+            if enemy is not None:
+                enemy.health -= self.damage  # Düşmana hasar ver
+                self.total_damage_dealt += self.damage  # Toplam verilen hasarı güncelle
+                if enemy.health <= 0:
+                    enemy.health = 0  # Sağlık sıfırın altına düşerse sıfırla
+                self.attack_cooldown = self.reload_cooldown  # Saldırı sonrası bekleme süresini başlat
         else:
             self.attack_cooldown -= 1  # Bekleme süresini azalt
 
 class Mortar(Tower):
+    __slots__ = ("self_damage_cooldown",)
+    max_health = 400  # Maksimum sağlık
+    damage = 50  # Hasar değeri
+    attack_range = 7 * grid_size  # Saldırı menzili
+    start_cooldown = 240  # İlk bekleme süresi
+    reload_cooldown = 240  # Saldırı sonrası bekleme süresi
+    self_damage = 2  # Kendi kendine zarar verme miktarı
+    self_damage_interval = 9  # Kendi kendine zarar verme bekleme süresi
+    splash_radius = 1  # Alan hasarı hedefin çevresindeki (2r+1)x(2r+1) kareye
+    color = DARK_BLUE  # Renk
+    cost = 120  # Havan maliyeti
+    target_strategy = "strongest"  # Alan hasarı en dayanıklı düşmanın çevresine
+
     def __init__(self, x, y):
         super().__init__(x, y)
-        self.health = 400  # Sağlık
-        self.max_health = 400  # Maksimum sağlık
-        self.damage = 50  # Hasar değeri
-        self.attack_range = 7 * grid_size  # Saldırı menzili
-        self.attack_cooldown = 240  # Saldırı bekleme süresi
-        self.self_damage = 2  # Kendi kendine zarar verme miktarı
-        self.color = DARK_BLUE  # Renk
-        self.self_damage_cooldown = 9  # Kendi kendine zarar verme bekleme süresi
-        self.cost = 120  # Havan maliyeti
+        self.self_damage_cooldown = self.self_damage_interval  # Kendi kendine zarar verme bekleme süresi
 
     def draw(self):
         rect = pygame.Rect(self.x * grid_size, self.y * grid_size, self.size, self.size)  # Kule dikdörtgeni
         pygame.draw.rect(screen, self.color, rect)  # Kuleyi ekrana çiz
-        draw_health_bar(screen, (self.x * grid_size, self.y * grid_size - 20), self.health, self.max_health, self.size, 5)  # Sağlık barını çiz
+        bar_rect = draw_health_bar(screen, (self.x * grid_size, self.y * grid_size - 20), self.health, self.max_health, self.size, 5)  # Sağlık barını çiz
+        return rect.union(bar_rect)  # Ekranda değişen alan
 
     def update(self):
         if self.self_damage_cooldown == 0:
             self.health -= self.self_damage  # Kendi kendine zarar ver
             if self.health < 0:
                 self.health = 0  # Sağlığı sıfırla
-            self.self_damage_cooldown = 9  # Kendi kendine zarar verme bekleme süresini sıfırla
+            self.self_damage_cooldown = self.self_damage_interval  # Kendi kendine zarar verme bekleme süresini sıfırla
         else:
             self.self_damage_cooldown -= 1  # Kendi kendine zarar verme bekleme süresini azalt
 
         if self.attack_cooldown > 0:
             self.attack_cooldown -= 1  # Saldırı bekleme süresini azalt
 
-    def attack(self, enemies):
+    def attack(self, enemies, enemy_cells=None):
         if self.attack_cooldown == 0:
-            for enemy in enemies:
-                if enemy.health > 0:
-                    distance = ((self.x * grid_size - enemy.x * grid_size) ** 2 +
-                                (self.y * grid_size - enemy.y * grid_size) ** 2) ** 0.5  # Hedefe olan mesafeyi hesapla
-                    if distance <= self.attack_range:
-                        # Hedefin kendisine zarar ver
-                        enemy.health -= self.damage
+            enemy = self.find_target(enemies, enemy_cells)  # Menzildeki ilk düşman
+            if enemy is not None:
+                # Hedefin kendisine zarar ver
+                enemy.health -= self.damage
+                self.total_damage_dealt += self.damage  # Toplam verilen hasarı güncelle
+                if enemy.health <= 0:
+                    enemy.health = 0  # Hedefin sağlığını sıfırla
+
+                # Hedefin çevresindeki alana saldırı (hedefin hücresi hariç)
+                if enemy_cells is not None:  # Izgara indeksi: sadece alandaki hücrelerdeki düşmanlar
+                    splashed = (e for cell in splash_area(self.splash_radius, enemy.x, enemy.y)
+                                for e in enemy_cells.get(cell, ()))
+                else:
+                    radius = self.splash_radius
+                    splashed = (e for e in enemies
+                                if abs(e.x - enemy.x) <= radius and abs(e.y - enemy.y) <= radius
+                                and (e.x != enemy.x or e.y != enemy.y))
+                for e in splashed:
+                    if e.health > 0:
+                        e.health -= self.damage  # Hedefin sağlığını azalt
                         self.total_damage_dealt += self.damage  # Toplam verilen hasarı güncelle
-                        if enemy.health <= 0:
-                            enemy.health = 0  # Hedefin sağlığını sıfırla
-                        
-                        # 2x2 alana saldırı
-                        for dx in range(-1, 2):
-                            for dy in range(-1, 2):
-                                if dx != 0 or dy != 0:  # Mevcut pozisyon dışında
-                                    target_x, target_y = enemy.x + dx, enemy.y + dy
-                                    for e in enemies:
-                                        if e.x == target_x and e.y == target_y and e.health > 0:
-                                            e.health -= self.damage  # Hedefin sağlığını azalt
-                                            self.total_damage_dealt += self.damage  # Toplam verilen hasarı güncelle
-                                            if e.health <= 0:
-                                                e.health = 0  # Hedefin sağlığını sıfırla
-                        self.attack_cooldown = 240  # Saldırı bekleme süresini sıfırla
-                        break  # İlk hedefe saldırdıktan sonra döngüden çık
+                        if e.health <= 0:
+                            e.health = 0  # Hedefin sağlığını sıfırla
+                self.attack_cooldown = self.reload_cooldown  # Saldırı bekleme süresini sıfırla
         else:
             self.attack_cooldown -= 1  # Saldırı bekleme süresini azalt
 
-       
\ No newline at end of file
+    def idle_ticks(self, game):
+        if self.health <= 0:
+            return 0
+        # Kendine zarar her 10 tick'te bir; sadece yıkıldığı tick bir olaydır
+        hits_left = math.ceil(self.health / self.self_damage)
+        idle = self.self_damage_cooldown + (self.self_damage_interval + 1) * (hits_left - 1)
+        if self.find_target(game.enemies, game.enemy_cells) is not None:
+            idle = min(idle, self.attack_cooldown // 2)  # update() ve attack() ikisi de bekleme azaltır
+        return idle
+
+    def fast_forward(self, ticks):
+        if ticks > self.self_damage_cooldown:
+            period = self.self_damage_interval + 1
+            hits = 1 + (ticks - self.self_damage_cooldown - 1) // period
+            self.health = max(0, self.health - hits * self.self_damage)
+            self.self_damage_cooldown = self.self_damage_interval - (ticks - self.self_damage_cooldown - 1 - period * (hits - 1))
+        else:
+            self.self_damage_cooldown -= ticks
+        self.attack_cooldown = max(0, self.attack_cooldown - 2 * ticks)
+
+# Oyun kuralları sonucu değiştirecek şekilde değiştiğinde artırılır (diskteki fitness önbelleği geçersiz olur)
+rules_version = 3
+
+tower_classes = {"Tower": Tower, "Mortar": Mortar, "CrossbowTower": CrossbowTower}
+enemy_classes = {"Enemy": Enemy, "Archer": Archer, "Giant": Giant}
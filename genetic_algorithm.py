@@ -0,0 +1,196 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from evaluator import FitnessEvaluator, default_max_ticks
+from fitness_cache import FitnessCache
+from game_classes import (
+    Game, canonical_placements, coverage_reach, grid_data, grid_width, grid_height, tower_classes,
+)
+
+# Genom: sabit uzunlukta tamsayı dizisi, her gen bir kule. Gen değeri hücre * len(kinds) + tür;
+# EMPTY boş yuva demektir. Yerleşimin sırası sonucu değiştirmez (bkz. canonical_placements).
+kinds = sorted(tower_classes)
+EMPTY = -1
+
+# (çalıştırma, ada) -> o adanın FitnessEvaluator'ı. Her ada hep aynı süreçte evrimleştiği için
+# değerlendiricisi ve önbelleği göçler arasında korunur; evolve() sonunda kapatılır.
+island_evaluators = {}
+run_ids = itertools.count()
+
+
+def legal_cells():
+    # Kule konabilen ve bir düşmanla etkileşebilecek hücreler; diğerlerine konan kule sadece para harcar
+    return sorted(cell for cell in coverage_reach()
+                  if 0 <= cell[0] < grid_width and 0 <= cell[1] < grid_height and cell not in grid_data)
+
+def decode(genome, cells):
+    return canonical_placements(
+        (kinds[gene % len(kinds)], *cells[gene // len(kinds)]) for gene in genome.tolist() if gene != EMPTY
+    )
+
+def random_genes(rng, shape, cells):
+    return rng.integers(EMPTY, len(cells) * len(kinds), size=shape)
+
+def evaluate_population(evaluator, population, cells, threshold=None):
+    # Fitness'lar ve her bireyin gerçekten alınan kuleleri (genomdaki kulelerin hepsi alınamayabilir).
+    # threshold: adanın en iyi fitness'ı; onu geçemeyecek oyunlar erken kesilir (bkz. ScorePruner)
+    results = evaluator.evaluate([decode(genome, cells) for genome in population], threshold)
+    return (np.array([result["fitness"] for result in results], dtype=float),
+            [result["placement"] for result in results])
+
+def next_generation(rng, evaluator, population, fitness, placements, cells, mutation_rate, tournament_size,
+                    elite):
+    # Tüm nesil dizi işlemleriyle üretilir: turnuva seçimi, tekdüze çaprazlama, gen başına mutasyon.
+    # En iyi 'elite' birey değişmeden (fitness'ı yeniden hesaplanmadan) kalır.
+    size, length = population.shape
+    order = np.argsort(-fitness, kind="stable")
+    offspring = size - elite
+
+    contestants = rng.integers(size, size=(2, offspring, tournament_size))
+    parents = np.take_along_axis(contestants, fitness[contestants].argmax(axis=2)[..., None], axis=2)[..., 0]
+    children = np.where(rng.random((offspring, length)) < 0.5, population[parents[0]], population[parents[1]])
+    mutated = rng.random(children.shape) < mutation_rate
+    children[mutated] = random_genes(rng, int(mutated.sum()), cells)
+
+    population = np.concatenate([population[order[:elite]], children])
+    children_fitness, children_placements = evaluate_population(evaluator, children, cells, float(fitness.max()))
+    fitness = np.concatenate([fitness[order[:elite]], children_fitness])
+    placements = [placements[i] for i in order[:elite].tolist()] + children_placements
+    return population, fitness, placements
+
+def island_evaluator(island, game_params, max_ticks, time_budget, prune_margin):
+    evaluator = island_evaluators.get(island)
+    if evaluator is None:
+        evaluator = island_evaluators[island] = FitnessEvaluator(
+            workers=1, game_params=game_params, cache=FitnessCache(),
+            max_ticks=max_ticks, time_budget=time_budget, prune_margin=prune_margin)
+    return evaluator
+
+def release_islands(run):
+    for island in [island for island in island_evaluators if island[0] == run]:
+        island_evaluators.pop(island).close()
+
+def evolve_island(island, population, fitness, placements, seed, generations, elite, cells, mutation_rate,
+                  tournament_size, game_params, max_ticks, time_budget, prune_margin):
+    # Adanın sürecinde çalışır: adayı göçler arası 'generations' nesil boyunca evrimleştir. Her nesil
+    # tek seferde değerlendirilir; aynı yerleşimler adanın önbelleği sayesinde bir kez simüle edilir.
+    # fitness None ise önce başlangıç nüfusu değerlendirilir. placements: bireylerin alınan kuleleri.
+    rng = np.random.default_rng(seed)
+    history = []
+    evaluator = island_evaluator(island, game_params, max_ticks, time_budget, prune_margin)
+    if fitness is None:
+        fitness, placements = evaluate_population(evaluator, population, cells)
+    for _ in range(generations):
+        population, fitness, placements = next_generation(rng, evaluator, population, fitness, placements,
+                                                          cells, mutation_rate, tournament_size, elite)
+        history.append((float(fitness.max()), float(fitness.mean())))
+    return population, fitness, placements, history
+
+
+class GeneticAlgorithm:
+    # Ada modeli: nüfus 'islands' adaya bölünür, her ada kendi sürecinde migration_interval nesil
+    # boyunca bağımsız evrimleşir, sonra her adanın en iyi 'migrants' bireyi halkadaki sonraki adanın
+    # en kötülerinin yerine geçer. Sonuç worker sayısından bağımsızdır (adaların tohumları seed'den).
+    # population_size: tüm adaların toplam nüfusu; genome_length verilmezse başlangıç parasıyla
+    # alınabilecek en fazla kule sayısı; game_class: en iyi yerleşimin oynatılacağı oyun sınıfı;
+    # prune_margin: bkz. FitnessEvaluator (verilmezse budama kazananı değiştirmez)
+    def __init__(self, population_size=1000, mutation_rate=0.1, generations=100, game_class=Game,
+                 islands=None, migration_interval=5, migrants=2, tournament_size=3, elite_fraction=0.05,
+                 genome_length=None, workers=None, game_params=None,
+                 max_ticks=default_max_ticks, time_budget=None, prune_margin=None, seed=None):
+        self.population_size = population_size
+        self.mutation_rate = mutation_rate
+        self.generations = generations
+        self.game_class = game_class
+        self.workers = workers or os.cpu_count() or 1
+        # Ada başına en az ~100 birey; küçük nüfus tek adada, süreç açmadan evrimleşir
+        self.islands = islands or max(1, min(self.workers, population_size // 100))
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.tournament_size = tournament_size
+        self.elite_fraction = elite_fraction
+        self.game_params = dict(game_params or {})
+        if genome_length is None:
+            money = self.game_params.get("money", game_class().money)
+            genome_length = max(1, money // min(cls.cost for cls in tower_classes.values()))
+        self.genome_length = genome_length
+        self.max_ticks = max_ticks
+        self.time_budget = time_budget
+        self.prune_margin = prune_margin
+        self.seed = seed
+        self.cells = legal_cells()
+        self.history = []  # (nesil, ada, en iyi fitness, ortalama fitness)
+        self.best_placement = None
+        self.best_fitness = None
+
+    def evolve(self):
+        rng = np.random.default_rng(self.seed)
+        sizes = [len(part) for part in np.array_split(np.arange(self.population_size), self.islands)]
+        populations = [random_genes(rng, (size, self.genome_length), self.cells) for size in sizes]
+        fitnesses = [None] * self.islands
+        placements = [None] * self.islands
+        elites = [max(1, int(size * self.elite_fraction)) for size in sizes]
+        task = partial(evolve_island, cells=self.cells, mutation_rate=self.mutation_rate,
+                       tournament_size=self.tournament_size, game_params=self.game_params,
+                       max_ticks=self.max_ticks, time_budget=self.time_budget, prune_margin=self.prune_margin)
+        run = (os.getpid(), next(run_ids))
+
+        # Tek süreçli havuzlar: ada i hep pools[i % len(pools)] sürecinde evrimleşir
+        pools = []
+        if self.islands > 1 and self.workers > 1:
+            pools = [ProcessPoolExecutor(max_workers=1) for _ in range(min(self.workers, self.islands))]
+        try:
+            generation = 0
+            while generation < self.generations:
+                count = min(self.migration_interval, self.generations - generation)
+                seeds = rng.integers(2 ** 63, size=self.islands).tolist()
+                arguments = [((run, i), populations[i], fitnesses[i], placements[i], seeds[i], count, elites[i])
+                             for i in range(self.islands)]
+                if pools:
+                    futures = [pools[i % len(pools)].submit(task, *args) for i, args in enumerate(arguments)]
+                    results = [future.result() for future in futures]
+                else:
+                    results = [task(*args) for args in arguments]
+                for island, result in enumerate(results):
+                    populations[island], fitnesses[island], placements[island], history = result
+                    self.history.extend((generation + i + 1, island, best, mean)
+                                        for i, (best, mean) in enumerate(history))
+                generation += count
+                if generation < self.generations:
+                    self.migrate(populations, fitnesses, placements)
+        finally:
+            for pool in pools:
+                pool.shutdown(wait=True, cancel_futures=True)
+            release_islands(run)
+
+        island = max(range(self.islands), key=lambda i: fitnesses[i].max())
+        best = int(fitnesses[island].argmax())
+        self.best_placement = placements[island][best]
+        self.best_fitness = float(fitnesses[island][best])
+        return self.best_placement, self.best_fitness
+
+    def migrate(self, populations, fitnesses, placements):
+        # Halka topolojisi: göçmenler göçten önceki durumdan seçilir, böylece sıra sonucu değiştirmez
+        emigrants = []
+        for population, fitness, placed in zip(populations, fitnesses, placements):
+            best = np.argsort(-fitness, kind="stable")[:self.migrants]
+            emigrants.append((population[best].copy(), fitness[best].copy(), [placed[i] for i in best.tolist()]))
+        for island in range(self.islands):
+            genomes, scores, placed = emigrants[island - 1]
+            worst = np.argsort(fitnesses[island], kind="stable")[:len(genomes)]
+            populations[island][worst] = genomes
+            fitnesses[island][worst] = scores
+            for i, placement in zip(worst.tolist(), placed):
+                placements[island][i] = placement
+
+    def best_game(self):
+        # En iyi yerleşimle kurulmuş yeni bir oyun (örn. ekranda izlemek için)
+        game = self.game_class()
+        for name, value in self.game_params.items():
+            setattr(game, name, value)
+        game.apply_placements(self.best_placement)
+        return game
@@ -13,58 +13,69 @@ from hill_climbing import ParallelHillClimbing
 from SimulatedAnnealing import SimulatedAnnealing
 
 from game_classes import (
-    Game, Tower, Mortar, CrossbowTower, screen, clock, fps, WHITE, TEAL, 
+    Game, Tower, Mortar, CrossbowTower, init_display, render_text, fps, WHITE, TEAL, 
     screen_width, screen_height, draw_health_bar, path_groups, map_data, 
     grid_size, grid_data, grid_width, grid_height , RED, BLACK, draw_paths, Enemy, Archer, Giant, 
     GREEN, GRAY, BLUE, DARK_BLUE, LIGHT_BLUE, ORANGE, PURPLE,
 )
+from profiler import TickProfiler
+from simulation_thread import SimulationThread, speeds
 
 
+# Menü düğmeleri sabit; her karede yeniden oluşturulmasın
+play_button = pygame.Rect(screen_width // 2 - 300, screen_height // 2 - 50, 200, 50)
+intro_button = pygame.Rect(screen_width // 2 - 0, screen_height // 2 - 50, 200, 50)
+ga_button = pygame.Rect(screen_width // 2 - 300, screen_height // 2 + 50, 200, 50)
+phc_button = pygame.Rect(screen_width // 2 - 0, screen_height // 2 + 50, 200, 50)
+sa_button = pygame.Rect(screen_width // 2 - 200, screen_height // 2 + 150, 350, 50)
+
+# Oyun hızı tuşları: 1x, 4x, 16x, en hızlı
+speed_keys = dict(zip((pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4), speeds))
 
 def print_game_over():
     screen.fill(WHITE)
-    font = pygame.font.Font(None, 74)
-    text_surface = font.render("Game Over", True, RED)
+    text_surface = render_text("Game Over", 74, RED)
     text_rect = text_surface.get_rect(center=(screen_width // 2, screen_height // 2))
     screen.blit(text_surface, text_rect)
     pygame.display.update()
     pygame.time.wait(2000)
 
-def draw_button(screen, text, font, color, rect):
+def draw_button(screen, text, size, color, rect):
     pygame.draw.rect(screen, color, rect)
-    text_surface = font.render(text, True, WHITE)
+    text_surface = render_text(text, size, WHITE)
     text_rect = text_surface.get_rect(center=rect.center)
     screen.blit(text_surface, text_rect)
 
 def game_introduction(game):
     intro_running = True
+    introduction_text = [
+        "Welcome to the Tower Defense Game!",
+        "Objective: Protect your main tower from enemy attacks.",
+        "Use towers, mortars, and crossbow towers to defend against enemies.",
+        "Click to place towers: Left Click for Tower, Right Click for Mortar, Middle Click for Crossbow Tower.",
+        "Survive as long as you can!",
+        "",
+        "Game Elements:",
+        "RED Enemy: Basic attacking unit that moves towards the main tower and deals damage.",
+        "PURPLE Archer: Ranged unit that attacks from a distance and can hit multiple targets.",
+        "ORANGE Giant: High health unit that deals heavy damage to towers and the main tower.",
+        "BLUE Tower: Basic defensive structure that attacks enemies within its range.",
+        "LIGHT_BLUE Crossbow Tower: Fast-attacking tower with a shorter range and lower damage.",
+        "DARK_BLUE Mortar: Long-range tower that deals area damage but damages itself over time.",
+        "GREEN Main Tower: The central structure you must protect from enemy attacks."
+    ]
+    lines = []
+    for i, line in enumerate(introduction_text):
+        if i > 6:  # Renkli satırlar için
+            color_name, text = line.split(' ', 1)  # Renk ve metni ayır
+            lines.append((text, eval(color_name)))  # Rengi al
+        else:
+            lines.append((line, BLACK))  # Normal siyah metin
+
     while intro_running:
         screen.fill(WHITE)
-        font = pygame.font.Font(None, 22)
-        introduction_text = [
-            "Welcome to the Tower Defense Game!",
-            "Objective: Protect your main tower from enemy attacks.",
-            "Use towers, mortars, and crossbow towers to defend against enemies.",
-            "Click to place towers: Left Click for Tower, Right Click for Mortar, Middle Click for Crossbow Tower.",
-            "Survive as long as you can!",
-            "",
-            "Game Elements:",
-            "RED Enemy: Basic attacking unit that moves towards the main tower and deals damage.",
-            "PURPLE Archer: Ranged unit that attacks from a distance and can hit multiple targets.",
-            "ORANGE Giant: High health unit that deals heavy damage to towers and the main tower.",
-            "BLUE Tower: Basic defensive structure that attacks enemies within its range.",
-            "LIGHT_BLUE Crossbow Tower: Fast-attacking tower with a shorter range and lower damage.",
-            "DARK_BLUE Mortar: Long-range tower that deals area damage but damages itself over time.",
-            "GREEN Main Tower: The central structure you must protect from enemy attacks."
-        ]
-        for i, line in enumerate(introduction_text):
-            if i > 6:  # Renkli satırlar için
-                color_name, text = line.split(' ', 1)  # Renk ve metni ayır
-                color = eval(color_name)  # Rengi al
-                text_surface = font.render(text, True, color)
-            else:
-                text_surface = font.render(line, True, BLACK)  # Normal siyah metin
-            screen.blit(text_surface, (50, 50 + i * 40))
+        for i, (text, color) in enumerate(lines):
+            screen.blit(render_text(text, 22, color), (50, 50 + i * 40))
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -83,23 +94,15 @@ def main_menu(game):
 
     while menu_running:
         screen.fill(WHITE)
-        font = pygame.font.Font(None, 74)
-        title_surface = font.render("Tower Defense Game", True, BLUE)
+        title_surface = render_text("Tower Defense Game", 74, BLUE)
         title_rect = title_surface.get_rect(center=(screen_width // 2, screen_height // 4))
         screen.blit(title_surface, title_rect)
 
-        font = pygame.font.Font(None, 36)
-        play_button = pygame.Rect(screen_width // 2 - 300, screen_height // 2 - 50, 200, 50)
-        intro_button = pygame.Rect(screen_width // 2 - 0, screen_height // 2 - 50, 200, 50)
-        ga_button = pygame.Rect(screen_width // 2 - 300, screen_height // 2 + 50, 200, 50)
-        phc_button = pygame.Rect(screen_width // 2 - 0, screen_height // 2 + 50, 200, 50)
-        sa_button = pygame.Rect(screen_width // 2 - 200, screen_height // 2 + 150, 350, 50)
-
-        draw_button(screen, "Play Game", font, TEAL, play_button)
-        draw_button(screen, "Introduction", font, TEAL, intro_button)
-        draw_button(screen, "Run GA", font, TEAL, ga_button)
-        draw_button(screen, "Run Parallel HC", font, TEAL, phc_button)
-        draw_button(screen, "Run Simulated Annealing", font, TEAL, sa_button)
+        draw_button(screen, "Play Game", 36, TEAL, play_button)
+        draw_button(screen, "Introduction", 36, TEAL, intro_button)
+        draw_button(screen, "Run GA", 36, TEAL, ga_button)
+        draw_button(screen, "Run Parallel HC", 36, TEAL, phc_button)
+        draw_button(screen, "Run Simulated Annealing", 36, TEAL, sa_button)
 
         pygame.display.update()
 
@@ -129,68 +132,44 @@ def main_menu(game):
 
 
 def main_game(game):
-    running = True
-    while running:
+    # Oyun kuralları SimulationThread'de sabit adımla işler; bu döngü girdileri komut olarak gönderir
+    # ve yayınlanan en yeni kareyi çizer. Yavaş bir kare simülasyonu yavaşlatmaz.
+    simulation = SimulationThread(game)
+    view = game.fork()  # Sadece çizim için, durumu her karede snapshot'tan kurulur
+    simulation.start()
+    shown = None  # Ekrandaki kare; tıklamalar onun tick'ine yerleşir
+    while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                simulation.stop()
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_x, mouse_y = pygame.mouse.get_pos()
                 grid_x, grid_y = mouse_x // grid_size, mouse_y // grid_size
-                if (grid_x, grid_y) not in grid_data and not any(t.x == grid_x and t.y == grid_y for t in game.towers + game.mortars + game.crossbow_towers):
-                    if event.button == 1 and game.money >= Tower(grid_x, grid_y).cost:  # Sol tıkla normal kule yerleştir
-                        game.towers.append(Tower(grid_x, grid_y))
-                        game.money -= Tower(grid_x, grid_y).cost  # Kule yerleştirildiğinde para azaltılır
-                    elif event.button == 3 and game.money >= Mortar(grid_x, grid_y).cost:  # Sağ tıkla havan yerleştir
-                        game.mortars.append(Mortar(grid_x, grid_y))
-                        game.money -= Mortar(grid_x, grid_y).cost  # Havan yerleştirildiğinde para azaltılır
-                    elif event.button == 2 and game.money >= CrossbowTower(grid_x, grid_y).cost:  # Orta tıkla arbalet kulesi yerleştir
-                        game.crossbow_towers.append(CrossbowTower(grid_x, grid_y))
-                        game.money -= CrossbowTower(grid_x, grid_y).cost  # Arbalet kulesi yerleştirildiğinde para azaltılır
-
-        game.enemies = [enemy for enemy in game.enemies if enemy.health > 0]
-        game.towers = [tower for tower in game.towers if tower.health > 0]
-        game.mortars = [mortar for mortar in game.mortars if mortar.health > 0]
-        game.crossbow_towers = [crossbow_tower for crossbow_tower in game.crossbow_towers if crossbow_tower.health > 0]
-
-        game.survival_time += 1 / fps  # Hayatta kalınan süreyi artır
-        game.update_score()
-        game.spawn_counter += 1
-        if game.spawn_counter % game.giant_spawn_frequency == 0:
-            game.spawn_giant()
-        elif game.spawn_counter % game.archer_spawn_frequency == 0:
-            game.spawn_archer()
-        elif game.spawn_counter % game.spawn_frequency == 0:
-            game.spawn_enemy()
-
-        screen.fill(WHITE)
-        for path_group in path_groups:
-            draw_paths(path_group)
-        game.main_tower.draw()
-        game.main_tower.attack(game.enemies)
-        for tower in game.towers:
-            tower.draw()
-            tower.attack(game.enemies)
-        for mortar in game.mortars:
-            mortar.draw()
-            mortar.update()
-            mortar.attack(game.enemies)
-        for crossbow_tower in game.crossbow_towers:
-            crossbow_tower.draw()
-            crossbow_tower.attack(game.enemies)
-        for enemy in game.enemies:
-            enemy.move(game)
-            enemy.draw()
-
-        if game.main_tower.health <= 0:
-            print_game_over()
-            main_menu(game)
-            return
-
-        game.draw_hud()  # HUD'yi ekrana çiz
-        
-        pygame.display.update()
+                # Sol tık: kule, sağ tık: havan, orta tık: arbalet kulesi
+                tower_class = {1: Tower, 3: Mortar, 2: CrossbowTower}.get(event.button)
+                if tower_class is not None:
+                    simulation.send("place", tower_class, grid_x, grid_y, shown and shown.tick)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                # F3: faz süreleri katmanını aç/kapat. Simülasyon fazları kendi iş parçacığında,
+                # çizim fazları burada ayrı bir profiler'la ölçülür.
+                simulation.send("profiler")
+                if view.profiler is None:
+                    view.profiler = TickProfiler()
+                view.profiler.overlay = not view.profiler.overlay
+            elif event.type == pygame.KEYDOWN and event.key in speed_keys:
+                simulation.send("speed", speed_keys[event.key])  # 1-4: 1x, 4x, 16x, en hızlı
+
+        frame = simulation.latest_frame()
+        if frame is not None:
+            shown = frame
+            view.draw_frame(frame)  # Haritayı, birimleri ve HUD'yi çiz
+            if frame.finished:
+                simulation.join()
+                print_game_over()
+                main_menu(game)
+                return
         clock.tick(fps)
 
 
@@ -266,7 +245,8 @@ def main_game(game):
 def run_genetic_algorithm():
     global ga
     ga = GeneticAlgorithm(population_size=10, mutation_rate=0.1, generations=10, game_class=Game)
-    ga.evolve()
+    best_placement, best_fitness = ga.evolve()
+    print("Genetic Algorithm Best Fitness:", best_fitness, best_placement)
 
 
 def run_parallel_hill_climbing():
@@ -285,6 +265,8 @@ def run_simulated_annealing():
     print("Simulated Annealing Best Fitness:", best_fitness)
        
 if __name__ == "__main__": 
-    # Oyunu başlat
+    # Pencereyi aç ve oyunu başlat
+    screen = init_display()
+    clock = pygame.time.Clock()
     game_instance = Game()
     main_menu(game_instance)
\ No newline at end of file
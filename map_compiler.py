@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array
+
+# Derlenmiş harita dosyaları map.json'un yanındaki bu klasörde, kaynağın özetiyle adlandırılır.
+# map.json değişince özet değişir ve eski dosya kendiliğinden kullanılmaz olur.
+cache_dir_name = ".map_cache"
+format_version = 1
+
+# Başlık: sihirli kelime, sürüm, grid_size/menzil ve izleyen dizilerin eleman sayıları
+map_header = struct.Struct("<8s10i")
+coverage_header = struct.Struct("<8s4i")
+map_magic = b"TDMAP\0\0\0"
+coverage_magic = b"TDCOVER\0"
+
+
+def load_map_data(filename):
+    with open(filename, 'r') as file:
+        data = json.load(file)
+    return {(int(item[0]), int(item[1])): item[2] for item in data}
+
+def find_path_starts_and_ends(grid_data):
+    path_starts = {}
+    path_ends = {}
+    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+    for (x, y), color in grid_data.items():
+        if color == "grey":
+            neighbors = [(x + dx, y + dy) for dx, dy in directions]
+            neighbor_colors = [grid_data.get((x + dx, y + dy), "white") for dx, dy in directions]
+            if neighbor_colors.count("grey") == 1 and neighbor_colors.count("white") == 3:
+                path_starts[(x, y)] = True
+            if neighbor_colors.count("grey") == 1 and neighbor_colors.count("green") == 1 and neighbor_colors.count("white") == 2:
+                path_ends[(x, y)] = True
+
+    return path_starts, path_ends
+
+def find_paths(grid_data, path_starts):
+    visited = set()
+    paths = []
+    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+    def dfs(start):
+        stack = [start]
+        path = []
+        while stack:
+            current = stack.pop()
+            if current not in visited:
+                visited.add(current)
+                path.append(current)
+                for dx, dy in directions:
+                    neighbor = (current[0] + dx, current[1] + dy)
+                    if grid_data.get(neighbor, None) == 'grey' and neighbor not in visited:
+                        stack.append(neighbor)
+        return path
+
+    for start in path_starts:
+        if start not in visited:
+            path = dfs(start)
+            if path:
+                paths.append(path)
+
+    return paths
+
+
+class CompiledMap:
+    # map.json'dan türetilen her şey: tekilleştirilmiş ızgara, sıralı yollar,
+    # ana kule konumu, yol hücrelerinin hedefe uzaklığı ve menzil başına kapsama tabloları
+    def __init__(self, source, grid_size, digest, map_data, path_starts, path_ends, paths,
+                 main_tower_position, path_distances):
+        self.source = source
+        self.grid_size = grid_size
+        self.digest = digest
+        self.map_data = map_data
+        self.grid_data = {(x // grid_size, y // grid_size): color for (x, y), color in map_data.items()}
+        self.path_starts = path_starts
+        self.path_ends = path_ends
+        self.paths = paths
+        self.main_tower_position = main_tower_position
+        self.path_distances = path_distances  # Yol hücresi -> yolun sonuna kalan adım sayısı
+        self.coverage_tables = {}
+
+    def coverage(self, attack_range):
+        # Izgara hücresi -> o hücreye konan ve bu menzile sahip kulenin kapsadığı yol hücreleri
+        table = self.coverage_tables.get(attack_range)
+        if table is None:
+            path = cache_path(self.source, "coverage-%s-%d.bin" % (self.digest, attack_range))
+            table = read_coverage(path, attack_range)
+            if table is None:
+                table = build_coverage(self.paths, attack_range, self.grid_size)
+                write_cached(path, pack_coverage(table, attack_range))
+            self.coverage_tables[attack_range] = table
+        return table
+
+
+def source_digest(source, grid_size):
+    # Anahtar kaynak dosyanın içeriği, grid_size ve dosya biçimi sürümünden oluşur
+    with open(source, "rb") as file:
+        digest = hashlib.sha1(file.read())
+    digest.update(b"%d:%d" % (format_version, grid_size))
+    return digest.hexdigest()[:16]
+
+def cache_path(source, name):
+    return os.path.join(os.path.dirname(os.path.abspath(source)), cache_dir_name, name)
+
+def compile_map(source, grid_size):
+    # Kaynaktan her şeyi baştan türet (derlenmiş dosya yoksa ya da eskiyse)
+    map_data = load_map_data(source)
+    grid_data = {(x // grid_size, y // grid_size): color for (x, y), color in map_data.items()}
+    path_starts, path_ends = find_path_starts_and_ends(grid_data)
+    paths = find_paths(grid_data, path_starts)
+    main_tower_position = next(((x // grid_size, y // grid_size) for (x, y), color in map_data.items()
+                                if color == "green"), None)
+    path_distances = {cell: len(path) - 1 - index for path in paths for index, cell in enumerate(path)}
+    return CompiledMap(source, grid_size, source_digest(source, grid_size), map_data,
+                       list(path_starts), list(path_ends), paths, main_tower_position, path_distances)
+
+def load_map(source, grid_size):
+    # Derlenmiş haritayı varsa oku, yoksa derleyip diske yaz
+    digest = source_digest(source, grid_size)
+    path = cache_path(source, "map-%s.bin" % digest)
+    compiled = read_map(path, source, grid_size, digest)
+    if compiled is None:
+        compiled = compile_map(source, grid_size)
+        write_cached(path, pack_map(compiled))
+    return compiled
+
+
+def int_array(values):
+    return array("i", values).tobytes()
+
+def pack_map(compiled):
+    colors = sorted(set(compiled.map_data.values()))
+    color_bytes = "\n".join(colors).encode("utf-8")
+    color_bytes += b"\0" * (-len(color_bytes) % 4)  # Diziler 4 bayt hizalı kalsın
+    color_ids = {color: index for index, color in enumerate(colors)}
+    grid = [value for (x, y), color in compiled.map_data.items() for value in (x, y, color_ids[color])]
+    path_lengths = [len(path) for path in compiled.paths]
+    path_cells = [value for path in compiled.paths for cell in path for value in cell]
+    distances = [compiled.path_distances[cell] for path in compiled.paths for cell in path]
+    starts = [value for cell in compiled.path_starts for value in cell]
+    ends = [value for cell in compiled.path_ends for value in cell]
+    main_x, main_y = compiled.main_tower_position or (-1, -1)
+    header = map_header.pack(map_magic, format_version, compiled.grid_size, len(color_bytes),
+                             len(compiled.map_data), len(compiled.paths), len(distances),
+                             len(compiled.path_starts), len(compiled.path_ends), main_x, main_y)
+    return b"".join((header, color_bytes, int_array(grid), int_array(path_lengths),
+                     int_array(path_cells), int_array(distances), int_array(starts), int_array(ends)))
+
+def pack_coverage(table, attack_range):
+    cells = list(table)
+    offsets = [0]
+    covered = []
+    for cell in cells:
+        covered.extend(value for covered_cell in sorted(table[cell]) for value in covered_cell)
+        offsets.append(len(covered) // 2)
+    header = coverage_header.pack(coverage_magic, format_version, attack_range, len(cells), offsets[-1])
+    return b"".join((header, int_array(value for cell in cells for value in cell),
+                     int_array(offsets), int_array(covered)))
+
+def write_cached(path, data):
+    # Önce geçici dosyaya yaz, sonra yerine taşı; aynı anda başlayan süreçler yarım dosya görmesin.
+    # Klasör yazılamıyorsa derlenen veri sadece bu süreçte kullanılır.
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = "%s.%d.tmp" % (path, os.getpid())
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        pass
+
+def read_file(path):
+    # Dosyalar küçük ve içerikleri hemen sözlüklere çevrildiği için tek seferde okunur
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except OSError:  # Dosya yok
+        return None
+
+def cell_pairs(values):
+    return [(values[i], values[i + 1]) for i in range(0, len(values), 2)]
+
+def read_map(path, source, grid_size, digest):
+    data = read_file(path)
+    if data is None or len(data) < map_header.size:
+        return None
+    (magic, version, stored_grid_size, color_size, grid_count, path_count, cell_count,
+     start_count, end_count, main_x, main_y) = map_header.unpack_from(data)
+    if magic != map_magic or version != format_version or stored_grid_size != grid_size:
+        return None
+    offset = map_header.size
+    colors = data[offset:offset + color_size].rstrip(b"\0").decode("utf-8").split("\n")
+    offset += color_size
+    sizes = (3 * grid_count, path_count, 2 * cell_count, cell_count, 2 * start_count, 2 * end_count)
+    if len(data) != offset + 4 * sum(sizes) or sys.byteorder != "little":
+        return None
+    values = array("i", data[offset:])
+    arrays = []
+    start = 0
+    for size in sizes:
+        arrays.append(values[start:start + size].tolist())
+        start += size
+    grid, path_lengths, path_cells, distances, starts, ends = arrays
+    map_data = {(grid[i], grid[i + 1]): colors[grid[i + 2]] for i in range(0, len(grid), 3)}
+    cells = cell_pairs(path_cells)
+    path_distances = dict(zip(cells, distances))
+    paths = []
+    for length in path_lengths:
+        paths.append(cells[:length])
+        cells = cells[length:]
+    main_tower_position = (main_x, main_y) if main_x >= 0 else None
+    return CompiledMap(source, grid_size, digest, map_data, cell_pairs(starts), cell_pairs(ends), paths,
+                       main_tower_position, path_distances)
+
+def read_coverage(path, attack_range):
+    data = read_file(path)
+    if data is None or len(data) < coverage_header.size:
+        return None
+    magic, version, stored_range, cell_count, covered_count = coverage_header.unpack_from(data)
+    sizes = (2 * cell_count, cell_count + 1, 2 * covered_count)
+    if (magic != coverage_magic or version != format_version or stored_range != attack_range
+            or sys.byteorder != "little"
+            or len(data) != coverage_header.size + 4 * sum(sizes)):
+        return None
+    values = array("i", data[coverage_header.size:])
+    cells = cell_pairs(values[:sizes[0]].tolist())
+    offsets = values[sizes[0]:sizes[0] + sizes[1]].tolist()
+    covered = cell_pairs(values[sizes[0] + sizes[1]:].tolist())
+    return {cell: frozenset(covered[offsets[i]:offsets[i + 1]]) for i, cell in enumerate(cells)}
+
+def build_coverage(paths, attack_range, grid_size):
+    # Menzil dairesine giren hücre kaydırmaları bir kez bulunur ve her yol hücresine uygulanır
+    reach = int(attack_range // grid_size)
+    offsets = [(dx, dy) for dx in range(-reach, reach + 1) for dy in range(-reach, reach + 1)
+               if (dx * grid_size) ** 2 + (dy * grid_size) ** 2 <= attack_range ** 2]
+    covered = {}
+    for path in paths:
+        for x, y in path:
+            for dx, dy in offsets:
+                covered.setdefault((x + dx, y + dy), []).append((x, y))
+    return {cell: frozenset(cells) for cell, cells in covered.items()}
+
+
+if __name__ == "__main__":
+    # Kullanım: python map_compiler.py [map.json] [grid_size]
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "map.json")
+    grid_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    compiled = compile_map(source, grid_size)
+    write_cached(cache_path(source, "map-%s.bin" % compiled.digest), pack_map(compiled))
+    print(f"{source}: {len(compiled.map_data)} cells, {len(compiled.paths)} paths "
+          f"({', '.join(str(len(path)) for path in compiled.paths)}), main tower {compiled.main_tower_position}")
@@ -0,0 +1,97 @@
+import csv
+import json
+from collections import deque, namedtuple
+
+# Tek bir ölçüm; sayılar olduğu gibi saklanır, biçimlendirme sadece çıktıya yazılırken yapılır
+Sample = namedtuple("Sample", [
+    "tick", "event", "survival_time", "score", "money",
+    "enemies", "towers", "mortars", "crossbow_towers", "main_tower_health",
+])
+
+
+class JsonlOutput:
+    # Her örnek bir satır JSON nesnesi
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, samples):
+        self.file.writelines(json.dumps(sample._asdict()) + "\n" for sample in samples)
+
+    def close(self):
+        self.file.close()
+
+
+class CsvOutput:
+    # Başlık satırı sadece boş dosyaya yazılır, böylece aynı dosyaya eklemeye devam edilebilir
+    def __init__(self, path):
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        if self.file.tell() == 0:
+            self.writer.writerow(Sample._fields)
+
+    def write(self, samples):
+        self.writer.writerows(samples)
+
+    def close(self):
+        self.file.close()
+
+
+outputs = {"none": None, "jsonl": JsonlOutput, "csv": CsvOutput}
+
+
+class MetricsSink:
+    # Oyun istatistikleri için halka tampon. Sıcak yolda sadece bir tuple eklenir;
+    # çıktı varsa tampondaki yeni örnekler dolunca ya da flush() ile toplu yazılır.
+    # interval: kaç tick'te bir "progress" örneği alınacağı (None: alma)
+    # score_events: skor her arttığında "score" örneği alınsın mı
+    def __init__(self, capacity=1024, interval=20 * 60, score_events=True, output="none", path=None):  # 60 FPS ile 20 saniye
+        self.samples = deque(maxlen=capacity)
+        self.interval = interval
+        self.score_events = score_events
+        output_class = outputs[output]
+        self.output = output_class(path) if output_class is not None else None
+        self.pending = 0  # Henüz çıktıya yazılmamış örnek sayısı
+        self.next_tick = interval  # Bir sonraki "progress" örneğinin tick'i
+
+    def record(self, sample):
+        self.samples.append(sample)
+        if self.output is not None:
+            self.pending += 1
+            if self.pending == self.samples.maxlen:
+                self.flush()
+
+    def on_score(self, game):
+        if self.score_events:
+            self.record(game.sample("score"))
+
+    def on_tick(self, game):
+        # Tick atlamalı simülasyonda aradaki katlar kaçırılmasın diye eşik ile karşılaştırılır
+        if self.interval is not None and game.ticks >= self.next_tick:
+            self.record(game.sample("progress"))
+            self.next_tick = (game.ticks // self.interval + 1) * self.interval
+
+    def on_end(self, game):
+        self.record(game.sample("end"))
+        self.flush()
+
+    def restart(self):
+        # Yeni oyun: örnekler ve çıktı korunur, sadece örnekleme zamanlayıcısı sıfırlanır
+        self.next_tick = self.interval
+
+    def flush(self):
+        if self.output is not None and self.pending:
+            samples = list(self.samples)[-self.pending:]
+            self.output.write(samples)
+            self.pending = 0
+
+    def close(self):
+        self.flush()
+        if self.output is not None:
+            self.output.close()
+            self.output = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
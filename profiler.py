@@ -0,0 +1,83 @@
+from collections import deque
+from time import perf_counter
+
+
+class TickProfiler:
+    # Oyun döngüsünün fazlarına (skor, temizlik, spawn, saldırılar, hareket, çizim...) harcanan
+    # toplam süreyi ve çağrı sayısını tutar. begin() bir tick'i açar, mark(faz) son işaretten beri
+    # geçen süreyi o faza yazar, end() tick'i kapatır. Bütçeyi (60 FPS için 16.7 ms) aşan tick'ler
+    # en çok süre alan fazla birlikte slow_ticks'e kaydedilir.
+    def __init__(self, budget=1 / 60, slow_ticks=100):
+        self.budget = budget
+        self.totals = {}  # Faz -> toplam saniye
+        self.counts = {}  # Faz -> çağrı sayısı
+        self.ticks = 0
+        self.tick_time = 0.0
+        self.slow_ticks = deque(maxlen=slow_ticks)  # (tick, süre, en yavaş faz, fazın süresi)
+        self.slow_count = 0
+        self.overlay = False  # Oyun ekranında özet gösterilsin mi (F3)
+        self.tick = None
+        self.start = None  # Açık tick'in başlangıcı; None ise açık tick yok
+        self.last = None
+        self.phases = {}
+
+    def begin(self, tick):
+        now = perf_counter()
+        if self.start is not None:
+            self.end(now)  # Görüntüsüz döngüde tick'ler bir sonraki begin() ile kapanır
+        self.tick = tick
+        self.start = self.last = now
+        self.phases = {}
+
+    def mark(self, phase):
+        if self.start is None:
+            return
+        now = perf_counter()
+        self.record(phase, now - self.last)
+        self.last = now
+
+    def record(self, phase, elapsed):
+        self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+        self.totals[phase] = self.totals.get(phase, 0.0) + elapsed
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+
+    def end(self, now=None):
+        if self.start is None:
+            return
+        if now is None:
+            now = perf_counter()
+        if now > self.last:
+            self.record("other", now - self.last)  # Son işaretten sonra geçen, fazı belli olmayan süre
+        elapsed = now - self.start
+        self.ticks += 1
+        self.tick_time += elapsed
+        if elapsed > self.budget:
+            phase = max(self.phases, key=self.phases.get, default="other")
+            self.slow_ticks.append((self.tick, elapsed, phase, self.phases.get(phase, elapsed)))
+            self.slow_count += 1
+        self.start = None
+
+    def report(self):
+        # Fazlar toplam süreye göre azalan sırada
+        return [
+            {
+                "phase": phase,
+                "total_sec": total,
+                "calls": self.counts[phase],
+                "ms_per_tick": total * 1000 / max(self.ticks, 1),
+            }
+            for phase, total in sorted(self.totals.items(), key=lambda item: -item[1])
+        ]
+
+    def overlay_lines(self):
+        lines = [f"tick {self.tick_time * 1000 / max(self.ticks, 1):.2f} ms  slow {self.slow_count}/{self.ticks}"]
+        lines.extend(f"{row['phase']}: {row['ms_per_tick']:.2f} ms" for row in self.report())
+        if self.slow_ticks:
+            tick, elapsed, phase, phase_time = self.slow_ticks[-1]
+            lines.append(f"last slow #{tick}: {elapsed * 1000:.1f} ms ({phase} {phase_time * 1000:.1f})")
+        return lines
+
+    def reset(self):
+        overlay = self.overlay
+        self.__init__(self.budget, self.slow_ticks.maxlen)
+        self.overlay = overlay
@@ -0,0 +1,77 @@
+import argparse
+import random
+import sys
+
+from game_classes import Game, coverage_reach, grid_data, grid_width, grid_height, tower_classes
+
+# Game.resume'un sözünü kontrol eder: kayıtlı bir oyundan devam edilen yerleşim, aynı yerleşimin baştan
+# oynanmasıyla aynı sonucu vermeli. Para sınırı dar tutulur ki kurallı sıradaki alımlar sonucu belirlesin.
+budgets = (100, 200, 300, 500)
+
+
+def layout_cells():
+    return sorted(cell for cell in coverage_reach()
+                  if 0 <= cell[0] < grid_width and 0 <= cell[1] < grid_height and cell not in grid_data)
+
+def random_layout(rng, cells, count):
+    return [(rng.choice(sorted(tower_classes)), *rng.choice(cells)) for _ in range(count)]
+
+def mutate(rng, cells, layout):
+    # Bir kuleyi değiştir, sil ya da ekle
+    layout = list(layout)
+    choice = rng.random()
+    if choice < 0.4 and layout:
+        layout[rng.randrange(len(layout))] = random_layout(rng, cells, 1)[0]
+    elif choice < 0.7 and layout:
+        del layout[rng.randrange(len(layout))]
+    else:
+        layout.insert(rng.randrange(len(layout) + 1), random_layout(rng, cells, 1)[0])
+    return layout
+
+def fresh_game(layout, money):
+    game = Game()
+    game.money = money
+    game.apply_placements(layout)
+    return game
+
+def play(game, snapshot_interval=None):
+    return game.play_game_instance(render=False, skip_ahead=True, snapshot_interval=snapshot_interval)
+
+def run_trial(rng, cells):
+    # Bir taban oyun, ondan devam edilen bir yerleşim ve onun kaydından devam edilen bir başkası;
+    # uyuşmayan her karşılaştırma için (yerleşim, baştan, devam) döner
+    money = rng.choice(budgets)
+    layout = random_layout(rng, cells, rng.randint(2, 8))
+    base = fresh_game(layout, money)
+    play(base, rng.choice((1, 30, 120)))
+    failures = []
+    parent = base
+    for _ in range(2):
+        layout = mutate(rng, cells, layout)
+        expected = play(fresh_game(layout, money))
+        child = parent.resume(layout)
+        actual = play(child, 60)
+        if actual != expected:
+            failures.append((money, layout, expected, actual))
+        parent = child
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Game.resume ile baştan oynanan oyunun karşılaştırması")
+    parser.add_argument("--trials", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    cells = layout_cells()
+    failures = []
+    for _ in range(args.trials):
+        failures.extend(run_trial(rng, cells))
+    for money, layout, expected, actual in failures:
+        print(f"money={money} {layout}: baştan {expected}, devam {actual}", file=sys.stderr)
+    print(f"{args.trials} deneme, {len(failures)} uyuşmazlık", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
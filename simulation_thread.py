@@ -0,0 +1,125 @@
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+from game_classes import fps
+from profiler import TickProfiler
+
+# Simülasyonun yayınladığı değişmez kare: oyun durumu (Game.snapshot(), sadece sayılardan oluşan
+# tuple'lar), faz süreleri katmanının satırları (kapalıysa None), ana kulenin yıkılıp yıkılmadığı
+# ve karenin üretildiği hız
+Frame = namedtuple("Frame", ["tick", "snapshot", "overlay", "finished", "speed"])
+
+# Oyun ekranındaki hız seçenekleri (1-4 tuşları); None beklemeden, olabildiğince hızlı demektir
+speeds = (1, 4, 16, None)
+
+
+class SimulationThread(threading.Thread):
+    # Oyun kurallarını çizimden ayrı bir iş parçacığında, sabit adımla (saniyede fps * speed tick)
+    # işletir. Kareler en fazla 'depth' kare tutan kuyruğa konur; kuyruk doluysa en eski kare atılır,
+    # böylece yavaş çizilen bir kare oyun mantığını bekletmez. Game nesnesine sadece bu iş parçacığı
+    # dokunur: çizici latest_frame() ile kare alır, girdileri send() ile komut olarak gönderir.
+    def __init__(self, game, speed=1, depth=2):
+        super().__init__(daemon=True)
+        self.game = game
+        self.speed = speed  # Gerçek zamana göre hız; None ise beklemeden, olabildiğince hızlı
+        self.frames = queue.Queue(maxsize=depth)
+        self.commands = queue.Queue()
+        self.stopped = threading.Event()
+        self.dropped_frames = 0  # Çizici yetişemediği için atılan kareler
+        self.published = deque(maxlen=32)  # Son yayınlanan karelerin (tick, snapshot) çiftleri, bkz. do_place
+
+    def send(self, command, *args):
+        # Çizici iş parçacığından: komut bir sonraki tick'ten önce işlenir
+        self.commands.put((command, args))
+
+    def stop(self):
+        self.stopped.set()
+
+    def latest_frame(self):
+        # Kuyruktaki en yeni kare (aradaki bayat kareler atılır); yeni kare yoksa None
+        frame = None
+        while True:
+            try:
+                frame = self.frames.get_nowait()
+            except queue.Empty:
+                return frame
+
+    def run(self):
+        game = self.game
+        next_tick = published = time.perf_counter()
+        self.publish()
+        while not self.stopped.is_set():
+            self.handle_commands()
+            game.step()
+            if game.profiler is not None:
+                game.profiler.end()  # Tick'i kapat: aşağıdaki bekleme tick süresine sayılmasın
+            finished = game.main_tower.health <= 0
+            now = time.perf_counter()
+            # Hızlandırılmışken her tick için kare üretilmez: ekran saniyede fps kareden fazlasını göstermez
+            if finished or now - published >= 0.5 / fps:
+                self.publish(finished)
+                published = now
+            if finished:
+                return
+
+            if self.speed is None:
+                next_tick = now
+                continue
+            next_tick += 1 / (fps * self.speed)
+            if next_tick > now:
+                self.stopped.wait(next_tick - now)
+            elif now - next_tick > 0.25:
+                next_tick = now  # Çok geride kaldıysa yakalamaya çalışma, buradan devam et
+
+    def publish(self, finished=False):
+        game = self.game
+        profiler = game.profiler
+        overlay = profiler.overlay_lines() if profiler is not None and profiler.overlay else None
+        frame = Frame(game.ticks, game.snapshot(), overlay, finished, self.speed)
+        self.published.append((frame.tick, frame.snapshot))
+        while True:
+            try:
+                self.frames.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()  # Çizici geride kaldı: en eski kareyi at
+                    self.dropped_frames += 1
+                except queue.Empty:
+                    pass
+
+    def handle_commands(self):
+        while True:
+            try:
+                command, args = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            getattr(self, "do_" + command)(*args)
+
+    def do_place(self, tower_class, x, y, tick=None):
+        # tick: tıklamanın yapıldığı karenin tick'i. Hızlandırılmışken simülasyon o karenin ilerisindedir;
+        # oyun o kareye geri sarılır, kule tam o tick'te yerleşir ve aradaki tick'ler yeniden işlenir
+        # (kurallar deterministik). Kare artık tutulmuyorsa kule şimdiki tick'te yerleşir.
+        game = self.game
+        snapshot = dict(self.published).get(tick) if tick is not None and tick < game.ticks else None
+        if snapshot is None:
+            game.place_tower(tower_class, x, y)
+            return
+        target = game.ticks
+        game.restore(snapshot)
+        game.history = [entry for entry in game.history if entry[0] <= tick]
+        game.first_visits = {cell: visit for cell, visit in game.first_visits.items() if visit <= tick}
+        game.place_tower(tower_class, x, y)
+        while game.ticks < target and game.main_tower.health > 0:
+            game.step()
+
+    def do_speed(self, speed):
+        self.speed = speed
+
+    def do_profiler(self):
+        # Faz süreleri katmanını aç/kapat (profil ilk açılışta başlar)
+        if self.game.profiler is None:
+            self.game.profiler = TickProfiler()
+        self.game.profiler.overlay = not self.game.profiler.overlay